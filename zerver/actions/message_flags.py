@@ -78,13 +78,16 @@ def do_mark_all_as_read(user_profile: UserProfile, *, timeout: float | None = No
                 event_time,
                 increment=updated_count,
             )
-            do_increment_logging_stat(
-                user_profile,
-                COUNT_STATS["messages_read_interactions::hour"],
-                None,
-                event_time,
-                increment=min(1, updated_count),
-            )
+            if count == 0:
+                # However many batches it takes, marking everything as
+                # read is a single interaction.
+                do_increment_logging_stat(
+                    user_profile,
+                    COUNT_STATS["messages_read_interactions::hour"],
+                    None,
+                    event_time,
+                    increment=min(1, updated_count),
+                )
 
             count += updated_count
             if updated_count < batch_size:
@@ -316,6 +319,11 @@ def do_update_message_flags(
             != flag_target
         ]
         count = len(messages)
+        if count == 0:
+            # Clients often resend flag updates for messages whose
+            # flags were already changed, e.g. while scrolling; there
+            # is nothing to write, and no event to send, for those.
+            return 0
 
         if DEFAULT_HISTORICAL_FLAGS & flagattr != flag_target:
             # When marking messages as read, creating "historical"
@@ -100,7 +100,7 @@ from zerver.models.recipients import get_direct_message_group_user_ids
 from zerver.models.scheduled_jobs import NotificationTriggers
 from zerver.models.streams import get_stream, get_stream_by_id_in_realm
 from zerver.models.users import get_system_bot, get_user_by_delivery_email, is_cross_realm_bot_email
-from zerver.tornado.django_api import send_event_on_commit
+from zerver.tornado.django_api import send_events_on_commit
 
 
 def compute_irc_user_fullname(email: str) -> str:
@@ -226,6 +226,7 @@ def get_recipient_info(
     muted_sender_user_ids: set[int] = get_muting_users(sender_id)
     topic_participant_user_ids: set[int] = set()
     sender_muted_stream: bool | None = None
+    rows: list[ActiveUserDict] = []
 
     if recipient.type == Recipient.PERSONAL:
         # The sender and recipient may be the same id, so
@@ -253,7 +254,11 @@ def get_recipient_info(
             # misses this sender. This is useful when the sender is sending their first message
             # in the topic.
             topic_participant_user_ids.add(sender_id)
-        subscription_rows = (
+        # We fetch the UserProfile fields needed for ActiveUserDict
+        # along with the subscriptions, rather than querying for all
+        # subscribers a second time below; on large channels, that
+        # second query is as expensive as this one.
+        subscription_rows = list(
             get_subscriptions_for_send_message(
                 realm_id=realm_id,
                 stream_id=stream_topic.stream_id,
@@ -277,6 +282,18 @@ def get_recipient_info(
                 followed_topic_wildcard_mentions_notify=F(
                     "user_profile__enable_followed_topic_wildcard_mentions_notify"
                 ),
+                enable_online_push_notifications=F(
+                    "user_profile__enable_online_push_notifications"
+                ),
+                enable_offline_email_notifications=F(
+                    "user_profile__enable_offline_email_notifications"
+                ),
+                enable_offline_push_notifications=F(
+                    "user_profile__enable_offline_push_notifications"
+                ),
+                is_bot=F("user_profile__is_bot"),
+                bot_type=F("user_profile__bot_type"),
+                long_term_idle=F("user_profile__long_term_idle"),
             )
             .values(
                 "user_profile_id",
@@ -290,6 +307,12 @@ def get_recipient_info(
                 "user_profile_push_notifications",
                 "user_profile_wildcard_mentions_notify",
                 "is_muted",
+                "enable_online_push_notifications",
+                "enable_offline_email_notifications",
+                "enable_offline_push_notifications",
+                "is_bot",
+                "bot_type",
+                "long_term_idle",
             )
             .order_by("user_profile_id")
         )
@@ -301,6 +324,17 @@ def get_recipient_info(
             # a later stage when we perform automatically unmute topic in muted stream operation.
             if row["user_profile_id"] == sender_id:
                 sender_muted_stream = row["is_muted"]
+            rows.append(
+                ActiveUserDict(
+                    id=row["user_profile_id"],
+                    enable_online_push_notifications=row["enable_online_push_notifications"],
+                    enable_offline_email_notifications=row["enable_offline_email_notifications"],
+                    enable_offline_push_notifications=row["enable_offline_push_notifications"],
+                    long_term_idle=row["long_term_idle"],
+                    is_bot=row["is_bot"],
+                    bot_type=row["bot_type"],
+                )
+            )
 
         user_id_to_visibility_policy = stream_topic.user_id_to_visibility_policy_dict()
 
@@ -376,7 +410,11 @@ def get_recipient_info(
     # mention syntax might have been in a code block or otherwise
     # escaped).  `get_ids_for` will filter these extra user rows
     # for our data structures not related to bots
-    user_ids = message_to_user_id_set | possibly_mentioned_user_ids
+    #
+    # For channel messages, we already have rows for the subscribers,
+    # so this only fetches possibly-mentioned users who aren't
+    # subscribed; usually, that's nobody.
+    user_ids = (message_to_user_id_set | possibly_mentioned_user_ids) - {row["id"] for row in rows}
 
     if user_ids:
         query: QuerySet[UserProfile, ActiveUserDict] = UserProfile.objects.filter(
@@ -398,23 +436,7 @@ def get_recipient_info(
             user_ids=sorted(user_ids),
             field="id",
         )
-        rows = list(query)
-    else:
-        # TODO: We should always have at least one user_id as a recipient
-        #       of any message we send.  Right now the exception to this
-        #       rule is `notify_new_user`, which, at least in a possibly
-        #       contrived test scenario, can attempt to send messages
-        #       to an inactive bot.  When we plug that hole, we can avoid
-        #       this `else` clause and just `assert(user_ids)`.
-        #
-        # UPDATE: It's February 2020 (and a couple years after the above
-        #         comment was written).  We have simplified notify_new_user
-        #         so that it should be a little easier to reason about.
-        #         There is currently some cleanup to how we handle cross
-        #         realm bots that is still under development.  Once that
-        #         effort is complete, we should be able to address this
-        #         to-do.
-        rows = []
+        rows.extend(query)
 
     def get_ids_for(f: Callable[[ActiveUserDict], bool]) -> set[int]:
         """Only includes users on the explicit message to line"""
@@ -929,7 +951,7 @@ def do_send_messages(
             recipient_type=send_request.message.recipient.type,
         )
 
-    bulk_insert_ums(ums)
+    bulk_insert_ums(ums, new_messages=True)
 
     for send_request in send_message_requests:
         do_widget_post_save_actions(send_request)
@@ -938,11 +960,24 @@ def do_send_messages(
     # Zulip system about the messages we just committed to the database:
     # * Sender automatically follows or unmutes the topic depending on 'automatically_follow_topics_policy'
     #   and 'automatically_unmute_topics_in_muted_streams_policy' user settings.
-    # * Notifying clients via send_event_on_commit
+    # * Notifying clients via send_events_on_commit
     # * Triggering outgoing webhooks via the service event queue.
     # * Updating the `first_message_id` field for streams without any message history.
     # * Implementing the Welcome Bot reply hack
     # * Adding links to the embed_links queue for open graph processing.
+    #
+    # The message events for Tornado are accumulated in
+    # tornado_events_by_realm and sent as a single batch per realm.
+    # Before sending any other event to Tornado, we flush that batch,
+    # so that clients still receive all events in the order they were
+    # generated.
+    tornado_events_by_realm: dict[int, tuple[Realm, list[tuple[dict[str, Any], list[Any]]]]] = {}
+
+    def flush_tornado_events() -> None:
+        for realm, tornado_events in tornado_events_by_realm.values():
+            send_events_on_commit(realm, tornado_events)
+        tornado_events_by_realm.clear()
+
     for send_request in send_message_requests:
         realm_id: int | None = None
         if send_request.message.is_stream_message():
@@ -979,6 +1014,7 @@ def do_send_messages(
                     visibility_policy,
                 )
                 if new_visibility_policy:
+                    flush_tornado_events()
                     do_set_user_topic_visibility_policy(
                         user_profile=sender,
                         stream=send_request.stream,
@@ -1021,6 +1057,7 @@ def do_send_messages(
                 to_follow_users = list(expect_follow_user_profiles - skip_follow_users)
 
                 if to_follow_users:
+                    flush_tornado_events()
                     bulk_do_set_user_topic_visibility_policy(
                         user_profiles=to_follow_users,
                         stream=send_request.stream,
@@ -1119,6 +1156,7 @@ def do_send_messages(
                 new_accessible_user,
                 notify_user_ids,
             ) in send_request.recipients_for_user_creation_events.items():
+                flush_tornado_events()
                 notify_created_user(new_accessible_user, list(notify_user_ids))
 
         event = dict(
@@ -1193,7 +1231,10 @@ def do_send_messages(
             event["local_id"] = send_request.local_id
         if send_request.sender_queue_id is not None:
             event["sender_queue_id"] = send_request.sender_queue_id
-        send_event_on_commit(send_request.realm, event, users)
+        _, tornado_events = tornado_events_by_realm.setdefault(
+            send_request.realm.id, (send_request.realm, [])
+        )
+        tornado_events.append((event, users))
 
         if send_request.links_for_embed:
             event_data = {
@@ -1212,6 +1253,9 @@ def do_send_messages(
             ):
                 from zerver.lib.onboarding import send_welcome_bot_response
 
+                # The Welcome Bot's reply must be delivered after the
+                # message it is replying to.
+                flush_tornado_events()
                 send_welcome_bot_response(send_request)
 
         assert send_request.service_queue_events is not None
@@ -1226,6 +1270,8 @@ def do_send_messages(
                     },
                 )
 
+    flush_tornado_events()
+
     sent_message_results = [
         SentMessageResult(
             message_id=send_request.message.id,
@@ -7,6 +7,7 @@ from django.db import connection, transaction
 from psycopg2 import sql
 
 from zerver.actions.user_activity import update_user_activity_interval
+from zerver.lib.cache import cache_bump_generation, realm_presence_generation_cache_key
 from zerver.lib.presence import (
     format_legacy_presence_dict,
     user_presence_datetime_with_date_joined_default,
@@ -256,6 +257,16 @@ def do_update_user_presence(
                 # Check if the row was actually created or if we
                 # hit the ON CONFLICT DO NOTHING case.
                 actually_created = cursor.rowcount > 0
+            if cursor.rowcount > 0:
+                # Presence polls trust the realm's cached latest
+                # last_update_id only while its generation is current
+                # (see get_realm_presence_last_update_id); bump it once
+                # this update is visible to them.
+                transaction.on_commit(
+                    lambda: cache_bump_generation(
+                        realm_presence_generation_cache_key(user_profile.realm_id)
+                    )
+                )
 
     if creating and not actually_created:
         # If we ended up doing nothing due to something else creating the row
@@ -1,4 +1,6 @@
 import hashlib
+import logging
+import time
 from collections import defaultdict
 from collections.abc import Collection, Iterable, Mapping
 from typing import Any, TypeAlias
@@ -47,7 +49,7 @@ from zerver.lib.streams import (
     stream_to_dict,
 )
 from zerver.lib.subscription_info import get_subscribers_query
-from zerver.lib.types import APISubscriptionDict
+from zerver.lib.types import APIStreamDict, APISubscriptionDict
 from zerver.lib.users import (
     get_subscribers_of_target_user_subscriptions,
     get_users_involved_in_dms_with_target_users,
@@ -68,7 +70,7 @@ from zerver.models import (
 )
 from zerver.models.groups import SystemGroups
 from zerver.models.users import active_non_guest_user_ids, active_user_ids, get_system_bot
-from zerver.tornado.django_api import send_event_on_commit
+from zerver.tornado.django_api import send_event_on_commit, send_events_on_commit
 
 
 def send_user_remove_events_on_stream_deactivation(
@@ -410,8 +412,10 @@ def send_subscription_add_events(
     recent_traffic = get_streams_traffic(stream_ids=stream_ids, realm=realm)
 
     # We generally only have a few streams, so we compute subscriber
-    # data in its own loop.
+    # data and the stream's API dictionary in their own loop, rather
+    # than once per subscribed user.
     stream_subscribers_dict: dict[int, list[int]] = {}
+    stream_dicts: dict[int, APIStreamDict] = {}
     for sub_info in sub_info_list:
         stream = sub_info.stream
         if stream.id not in stream_subscribers_dict:
@@ -420,6 +424,7 @@ def send_subscription_add_events(
             else:
                 subscribers = list(subscriber_dict[stream.id])
             stream_subscribers_dict[stream.id] = subscribers
+            stream_dicts[stream.id] = stream_to_dict(stream, recent_traffic)
 
     for user_id, sub_infos in info_by_user.items():
         sub_dicts: list[APISubscriptionDict] = []
@@ -427,7 +432,7 @@ def send_subscription_add_events(
             stream = sub_info.stream
             stream_subscribers = stream_subscribers_dict[stream.id]
             subscription = sub_info.sub
-            stream_dict = stream_to_dict(stream, recent_traffic)
+            stream_dict = stream_dicts[stream.id]
             # This is verbose as we cannot unpack existing TypedDict
             # to initialize another TypedDict while making mypy happy.
             # https://github.com/python/mypy/issues/5382
@@ -554,6 +559,15 @@ def send_peer_subscriber_events(
 
     assert op in ["peer_add", "peer_remove"]
 
+    # Streams whose altered users and peers are the same get a single
+    # event; for example, subscribing a batch of new users to several
+    # default public streams at once sends one event, rather than one
+    # per stream.  This relies on the event meaning that every user in
+    # user_ids was (un)subscribed from every stream in stream_ids.
+    stream_ids_by_audience: dict[tuple[frozenset[int], frozenset[int]], list[int]] = defaultdict(
+        list
+    )
+
     private_stream_ids = [
         stream_id for stream_id in altered_user_dict if stream_dict[stream_id].invite_only
     ]
@@ -564,13 +578,8 @@ def send_peer_subscriber_events(
         peer_user_ids = private_peer_dict[stream_id] - altered_user_ids
 
         if peer_user_ids and altered_user_ids:
-            event = dict(
-                type="subscription",
-                op=op,
-                stream_ids=[stream_id],
-                user_ids=sorted(altered_user_ids),
-            )
-            send_event_on_commit(realm, event, peer_user_ids)
+            audience = (frozenset(altered_user_ids), frozenset(peer_user_ids))
+            stream_ids_by_audience[audience].append(stream_id)
 
     public_stream_ids = [
         stream_id
@@ -585,8 +594,6 @@ def send_peer_subscriber_events(
     subscriber_dict = subscriber_peer_info.subscribed_ids
 
     if public_stream_ids:
-        user_streams: dict[int, set[int]] = defaultdict(set)
-
         non_guest_user_ids = set(active_non_guest_user_ids(realm.id))
 
         if web_public_stream_ids:
@@ -601,41 +608,23 @@ def send_peer_subscriber_events(
                 peer_user_ids = (non_guest_user_ids | subscriber_dict[stream_id]) - altered_user_ids
 
             if peer_user_ids and altered_user_ids:
-                if len(altered_user_ids) == 1:
-                    # If we only have one user, we will try to
-                    # find other streams they have (un)subscribed to
-                    # (where it's just them).  This optimization
-                    # typically works when a single user is subscribed
-                    # to multiple default public streams during
-                    # new-user registration.
-                    #
-                    # This optimization depends on all public streams
-                    # having the same peers for any single user, which
-                    # isn't the case for private streams.
-                    [altered_user_id] = altered_user_ids
-                    user_streams[altered_user_id].add(stream_id)
-                else:
-                    event = dict(
-                        type="subscription",
-                        op=op,
-                        stream_ids=[stream_id],
-                        user_ids=sorted(altered_user_ids),
-                    )
-                    send_event_on_commit(realm, event, peer_user_ids)
-
-        for user_id, stream_ids in user_streams.items():
-            if stream_id in web_public_stream_ids:
-                peer_user_ids = web_public_peer_ids - altered_user_ids
-            else:
-                peer_user_ids = (non_guest_user_ids | subscriber_dict[stream_id]) - altered_user_ids
+                audience = (frozenset(altered_user_ids), frozenset(peer_user_ids))
+                stream_ids_by_audience[audience].append(stream_id)
 
-            event = dict(
+    events = [
+        (
+            dict(
                 type="subscription",
                 op=op,
                 stream_ids=sorted(stream_ids),
-                user_ids=[user_id],
-            )
-            send_event_on_commit(realm, event, peer_user_ids)
+                user_ids=sorted(altered_user_ids),
+            ),
+            peer_user_ids,
+        )
+        for (altered_user_ids, peer_user_ids), stream_ids in stream_ids_by_audience.items()
+    ]
+    if events:
+        send_events_on_commit(realm, events)
 
 
 def send_user_creation_events_on_adding_subscriptions(
@@ -699,6 +688,11 @@ def send_user_creation_events_on_adding_subscriptions(
 
 SubT: TypeAlias = tuple[list[SubInfo], list[SubInfo]]
 
+# Bulk subscription changes at least this large, e.g. subscribing a
+# few thousand users to a realm's onboarding channels, log how long
+# they took.
+BULK_ADD_SUBSCRIPTIONS_LOG_THRESHOLD = 1000
+
 
 @transaction.atomic(savepoint=False)
 def bulk_add_subscriptions(
@@ -710,6 +704,7 @@ def bulk_add_subscriptions(
     *,
     acting_user: UserProfile | None,
 ) -> SubT:
+    start = time.monotonic()
     users = list(users)
     user_ids = [user.id for user in users]
 
@@ -851,6 +846,17 @@ def bulk_add_subscriptions(
         subscriber_peer_info=subscriber_peer_info,
     )
 
+    num_subs_added = len(subs_to_add) + len(subs_to_activate)
+    if num_subs_added >= BULK_ADD_SUBSCRIPTIONS_LOG_THRESHOLD:
+        logging.info(
+            "Added %d subscriptions for %d users to %d channels in realm %s in %.1fs",
+            num_subs_added,
+            len(altered_streams_dict),
+            len(altered_user_dict),
+            realm.string_id,
+            time.monotonic() - start,
+        )
+
     return (
         subs_to_add + subs_to_activate,
         already_subscribed,
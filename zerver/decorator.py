@@ -52,7 +52,7 @@ from zerver.lib.timestamp import datetime_to_timestamp, timestamp_to_datetime
 from zerver.lib.typed_endpoint import typed_endpoint
 from zerver.lib.users import is_2fa_verified
 from zerver.lib.utils import has_api_key_format
-from zerver.lib.webhooks.common import notify_bot_owner_about_invalid_json
+from zerver.lib.webhooks.common import notify_bot_owner_about_invalid_json, send_webhook_messages
 from zerver.models import UserProfile
 from zerver.models.clients import get_client
 from zerver.models.users import get_user_profile_by_api_key
@@ -351,9 +351,20 @@ def webhook_view(
             request_notes.is_webhook_view = True
 
             rate_limit_user(request, user_profile, domain="api_by_user")
+            request_notes.webhook_messages = []
             try:
-                return view_func(request, user_profile, *args, **kwargs)
+                response = view_func(request, user_profile, *args, **kwargs)
+                send_webhook_messages(request)
+                return response
             except Exception as err:
+                # Messages generated before the error are still sent, as
+                # they would have been had they not been batched.  If
+                # that fails too, we log it, and still handle and raise
+                # the original error.
+                try:
+                    send_webhook_messages(request)
+                except Exception as send_err:
+                    log_exception_to_webhook_logger(request, send_err)
                 if not isinstance(err, JsonableError):
                     # An unexpected exception of some form -- log it
                     log_exception_to_webhook_logger(request, err)
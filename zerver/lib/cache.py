@@ -2,12 +2,15 @@
 import hashlib
 import logging
 import os
+import pickle
 import re
 import secrets
 import sys
 import time
 import traceback
+from collections import OrderedDict
 from collections.abc import Callable, Iterable, Sequence
+from contextlib import suppress
 from functools import _lru_cache_wrapper, lru_cache, wraps
 from typing import TYPE_CHECKING, Any, Generic, TypeVar
 
@@ -42,6 +45,14 @@ def get_remote_cache_requests() -> int:
     return remote_cache_total_requests
 
 
+def get_in_process_cache_requests() -> int:
+    return in_process_cache_total_requests
+
+
+def get_in_process_cache_hits() -> int:
+    return in_process_cache_total_hits
+
+
 def remote_cache_stats_start() -> None:
     global remote_cache_time_start
     remote_cache_time_start = time.time()
@@ -109,6 +120,150 @@ def get_cache_backend(cache_name: str | None) -> BaseCache:
     return caches[cache_name]
 
 
+# The in-process cache is an optional LRU cache, in front of
+# memcached, for a few families of extremely hot keys whose values
+# rarely change; it is enabled by setting IN_PROCESS_CACHE_SIZE.
+# Values are stored pickled, so that callers never share mutable
+# objects, as with memcached.
+#
+# Whenever any process sets or deletes keys in one of these families,
+# it increments a generation counter stored in memcached, and stores
+# the list of those keys under the new generation.  Every process
+# checks the counter between requests (see flush_per_request_caches),
+# and drops just the keys invalidated since the generation it last
+# saw; so, like the per-request caches, a process may only see a stale
+# value until the end of the current request.  If a process has
+# fallen too far behind, or any of those lists has been evicted, it
+# empties its in-process cache instead.
+#
+# Realm objects themselves are not cached in memcached (get_realm
+# queries the database), and the realm-keyed families that flush_realm
+# invalidates, such as realm_user_dicts and active_user_ids, are large
+# and change whenever any user in the realm does; so none of them is
+# included here.
+IN_PROCESS_CACHE_KEY_FAMILIES = {
+    "display_recipient_dict",
+    "user_profile_by_api_key",
+    "user_profile_by_id",
+}
+IN_PROCESS_CACHE_GENERATION_KEY = "in_process_cache_generation"
+IN_PROCESS_CACHE_INVALIDATED_KEYS_KEY = "in_process_cache_invalidated_keys"
+MAX_IN_PROCESS_CACHE_GENERATIONS_BEHIND = 100
+
+in_process_cache: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+in_process_cache_generation: int | None = None
+in_process_cache_total_requests = 0
+in_process_cache_total_hits = 0
+
+
+def in_process_cache_invalidated_keys_key(generation: int) -> str:
+    return f"{KEY_PREFIX}{IN_PROCESS_CACHE_INVALIDATED_KEYS_KEY}:{generation}"
+
+
+def is_in_process_cache_key(key: str) -> bool:
+    return key.split(":", 1)[0] in IN_PROCESS_CACHE_KEY_FAMILIES
+
+
+def in_process_cache_get(key: str) -> tuple[Any] | None:
+    global in_process_cache_total_requests, in_process_cache_total_hits
+    if settings.IN_PROCESS_CACHE_SIZE == 0 or not is_in_process_cache_key(key):
+        return None
+
+    in_process_cache_total_requests += 1
+    final_key = KEY_PREFIX + key
+    entry = in_process_cache.get(final_key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+
+    in_process_cache_total_hits += 1
+    in_process_cache.move_to_end(final_key)
+    # The pickled bytes were produced by this process, in in_process_cache_set.
+    return pickle.loads(entry[1])  # noqa: S301
+
+
+def in_process_cache_set(key: str, val: tuple[Any]) -> None:
+    if settings.IN_PROCESS_CACHE_SIZE == 0 or not is_in_process_cache_key(key):
+        return
+
+    final_key = KEY_PREFIX + key
+    in_process_cache[final_key] = (
+        time.monotonic() + settings.IN_PROCESS_CACHE_TIMEOUT,
+        pickle.dumps(val),
+    )
+    in_process_cache.move_to_end(final_key)
+    while len(in_process_cache) > settings.IN_PROCESS_CACHE_SIZE:
+        in_process_cache.popitem(last=False)
+
+
+def invalidate_in_process_caches(keys: Iterable[str]) -> None:
+    if settings.IN_PROCESS_CACHE_SIZE == 0:
+        return
+
+    keys = [key for key in keys if is_in_process_cache_key(key)]
+    if not keys:
+        return
+
+    for key in keys:
+        in_process_cache.pop(KEY_PREFIX + key, None)
+
+    cache_backend = get_cache_backend(None)
+    generation_key = KEY_PREFIX + IN_PROCESS_CACHE_GENERATION_KEY
+    remote_cache_stats_start()
+    try:
+        generation = cache_backend.incr(generation_key)
+    except ValueError:
+        # The counter was evicted, or has never been set.  It restarts
+        # from a random value, so that no process mistakes the new
+        # generations for ones it has already seen.
+        cache_backend.add(generation_key, secrets.randbelow(2**48), timeout=None)
+        generation = cache_backend.incr(generation_key)
+    cache_backend.set(
+        in_process_cache_invalidated_keys_key(generation),
+        keys,
+        timeout=settings.IN_PROCESS_CACHE_TIMEOUT,
+    )
+    remote_cache_stats_finish()
+
+
+def check_in_process_cache_generation() -> None:
+    global in_process_cache_generation
+    if settings.IN_PROCESS_CACHE_SIZE == 0:
+        return
+
+    generation_key = KEY_PREFIX + IN_PROCESS_CACHE_GENERATION_KEY
+    cache_backend = get_cache_backend(None)
+    remote_cache_stats_start()
+    generation = cache_backend.get(generation_key)
+    if generation is None:
+        cache_backend.add(generation_key, secrets.randbelow(2**48), timeout=None)
+        generation = cache_backend.get(generation_key)
+
+    invalidated_keys_keys: list[str] = []
+    invalidated_keys: dict[str, list[str]] = {}
+    if (
+        generation is not None
+        and in_process_cache_generation is not None
+        and 0 < generation - in_process_cache_generation <= MAX_IN_PROCESS_CACHE_GENERATIONS_BEHIND
+    ):
+        invalidated_keys_keys = [
+            in_process_cache_invalidated_keys_key(i)
+            for i in range(in_process_cache_generation + 1, generation + 1)
+        ]
+        invalidated_keys = cache_backend.get_many(invalidated_keys_keys)
+    remote_cache_stats_finish()
+
+    if generation is not None and generation == in_process_cache_generation:
+        return
+
+    if invalidated_keys_keys and len(invalidated_keys) == len(invalidated_keys_keys):
+        for keys in invalidated_keys.values():
+            for key in keys:
+                in_process_cache.pop(KEY_PREFIX + key, None)
+    else:
+        in_process_cache.clear()
+    in_process_cache_generation = generation
+
+
 def cache_with_key(
     keyfunc: Callable[ParamT, str],
     cache_name: str | None = None,
@@ -126,6 +281,11 @@ def cache_with_key(
         def func_with_caching(*args: ParamT.args, **kwargs: ParamT.kwargs) -> ReturnT:
             key = keyfunc(*args, **kwargs)
 
+            if cache_name is None:
+                val = in_process_cache_get(key)
+                if val is not None:
+                    return val[0]
+
             try:
                 val = cache_get(key, cache_name=cache_name)
             except InvalidCacheKeyError:
@@ -136,6 +296,8 @@ def cache_with_key(
             # Values are singleton tuples so that we can distinguish
             # a result of None from a missing key.
             if val is not None:
+                if cache_name is None:
+                    in_process_cache_set(key, val)
                 return val[0]
 
             val = func(*args, **kwargs)
@@ -145,7 +307,17 @@ def cache_with_key(
                     stack_info=True,
                 )
             else:
-                cache_set(key, val, cache_name=cache_name, timeout=timeout)
+                # Filling the cache from the database doesn't change
+                # the value any other process could have cached.
+                cache_set(
+                    key,
+                    val,
+                    cache_name=cache_name,
+                    timeout=timeout,
+                    invalidate_in_process_cache=False,
+                )
+                if cache_name is None:
+                    in_process_cache_set(key, (val,))
 
             return val
 
@@ -185,7 +357,12 @@ def validate_cache_key(key: str) -> None:
 
 
 def cache_set(
-    key: str, val: Any, cache_name: str | None = None, timeout: int | None = None
+    key: str,
+    val: Any,
+    cache_name: str | None = None,
+    timeout: int | None = None,
+    *,
+    invalidate_in_process_cache: bool = True,
 ) -> None:
     final_key = KEY_PREFIX + key
     validate_cache_key(final_key)
@@ -194,6 +371,8 @@ def cache_set(
     cache_backend = get_cache_backend(cache_name)
     cache_backend.set(final_key, (val,), timeout=timeout)
     remote_cache_stats_finish()
+    if cache_name is None and invalidate_in_process_cache:
+        invalidate_in_process_caches([key])
 
 
 def cache_get(key: str, cache_name: str | None = None) -> Any:
@@ -235,21 +414,30 @@ def safe_cache_get_many(keys: list[str], cache_name: str | None = None) -> dict[
 
 
 def cache_set_many(
-    items: dict[str, Any], cache_name: str | None = None, timeout: int | None = None
+    items: dict[str, Any],
+    cache_name: str | None = None,
+    timeout: int | None = None,
+    *,
+    invalidate_in_process_cache: bool = True,
 ) -> None:
     new_items = {}
     for key in items:
         new_key = KEY_PREFIX + key
         validate_cache_key(new_key)
         new_items[new_key] = items[key]
-    items = new_items
     remote_cache_stats_start()
-    get_cache_backend(cache_name).set_many(items, timeout=timeout)
+    get_cache_backend(cache_name).set_many(new_items, timeout=timeout)
     remote_cache_stats_finish()
+    if cache_name is None and invalidate_in_process_cache:
+        invalidate_in_process_caches(items.keys())
 
 
 def safe_cache_set_many(
-    items: dict[str, Any], cache_name: str | None = None, timeout: int | None = None
+    items: dict[str, Any],
+    cache_name: str | None = None,
+    timeout: int | None = None,
+    *,
+    invalidate_in_process_cache: bool = True,
 ) -> None:
     """Variant of cache_set_many that drops saving any keys that fail
     validation, rather than throwing an exception visible to the
@@ -258,7 +446,9 @@ def safe_cache_set_many(
         # Almost always the keys will all be correct, so we just try
         # to do normal cache_set_many to avoid the overhead of
         # validating all the keys here.
-        return cache_set_many(items, cache_name, timeout)
+        return cache_set_many(
+            items, cache_name, timeout, invalidate_in_process_cache=invalidate_in_process_cache
+        )
     except InvalidCacheKeyError:
         stack_trace = traceback.format_exc()
 
@@ -266,7 +456,9 @@ def safe_cache_set_many(
         log_invalid_cache_keys(stack_trace, bad_keys)
 
         good_items = {key: items[key] for key in good_keys}
-        return cache_set_many(good_items, cache_name, timeout)
+        return cache_set_many(
+            good_items, cache_name, timeout, invalidate_in_process_cache=invalidate_in_process_cache
+        )
 
 
 def cache_delete(key: str, cache_name: str | None = None) -> None:
@@ -276,15 +468,52 @@ def cache_delete(key: str, cache_name: str | None = None) -> None:
     remote_cache_stats_start()
     get_cache_backend(cache_name).delete(final_key)
     remote_cache_stats_finish()
+    if cache_name is None:
+        invalidate_in_process_caches([key])
+
+
+def cache_get_generation(key: str) -> int | None:
+    """Returns the value of a generation counter, maintained with
+    cache_bump_generation.  A counter that is not set (e.g. because it
+    was evicted) is started at a random value, so that nothing tagged
+    with an earlier generation is mistaken for current.  Returns None
+    if memcached is unavailable."""
+    final_key = KEY_PREFIX + key
+    validate_cache_key(final_key)
+
+    remote_cache_stats_start()
+    cache_backend = get_cache_backend(None)
+    generation = cache_backend.get(final_key)
+    if generation is None:
+        cache_backend.add(final_key, secrets.randbelow(2**48), timeout=None)
+        generation = cache_backend.get(final_key)
+    remote_cache_stats_finish()
+    return generation
+
+
+def cache_bump_generation(key: str) -> None:
+    final_key = KEY_PREFIX + key
+    validate_cache_key(final_key)
+
+    remote_cache_stats_start()
+    # If the counter is not set, cache_get_generation will start it at
+    # a new random value, which invalidates everything tagged with a
+    # generation anyway.
+    with suppress(ValueError):
+        get_cache_backend(None).incr(final_key)
+    remote_cache_stats_finish()
 
 
 def cache_delete_many(items: Iterable[str], cache_name: str | None = None) -> None:
+    items = list(items)
     keys = [KEY_PREFIX + item for item in items]
     for key in keys:
         validate_cache_key(key)
     remote_cache_stats_start()
     get_cache_backend(cache_name).delete_many(keys)
     remote_cache_stats_finish()
+    if cache_name is None:
+        invalidate_in_process_caches(items)
 
 
 def filter_good_and_bad_keys(keys: list[str]) -> tuple[list[str], list[str]]:
@@ -371,7 +600,7 @@ def generic_bulk_cached_fetch(
         items_for_remote_cache[key] = (setter(item),)
         cached_objects[key] = item
     if len(items_for_remote_cache) > 0:
-        safe_cache_set_many(items_for_remote_cache)
+        safe_cache_set_many(items_for_remote_cache, invalidate_in_process_cache=False)
     return {
         object_id: cached_objects[cache_keys[object_id]]
         for object_id in object_ids
@@ -476,6 +705,14 @@ def get_realm_seat_count_cache_key(realm_id: int) -> str:
     return f"realm_seat_count:{realm_id}"
 
 
+def realm_presence_last_update_id_cache_key(realm_id: int) -> str:
+    return f"realm_presence_last_update_id:{realm_id}"
+
+
+def realm_presence_generation_cache_key(realm_id: int) -> str:
+    return f"realm_presence_generation:{realm_id}"
+
+
 def active_user_ids_cache_key(realm_id: int) -> str:
     return f"active_user_ids:{realm_id}"
 
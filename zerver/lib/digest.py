@@ -348,6 +348,18 @@ def bulk_get_digest_context(
     user_ids = [user.id for user in users]
     user_stream_map = get_user_stream_map(user_ids, cutoff_date)
 
+    # Rendering a topic's sample messages for the email is the most
+    # expensive part of building a digest, and the result depends on
+    # the user only via their realm (the same for all users here),
+    # default_language, and emojiset; so we share it between users.
+    teaser_data_cache: dict[tuple[TopicKey, str, str], dict[str, Any]] = {}
+
+    def get_teaser_data(hot_topic: DigestTopic, user: UserProfile) -> dict[str, Any]:
+        key = (hot_topic.topic_key, user.default_language, user.emojiset)
+        if key not in teaser_data_cache:
+            teaser_data_cache[key] = hot_topic.teaser_data(user, stream_id_map)
+        return teaser_data_cache[key]
+
     for user in users:
         stream_ids = user_stream_map[user.id]
 
@@ -365,7 +377,7 @@ def bulk_get_digest_context(
 
         # Get context data for hot conversations.
         context["hot_conversations"] = [
-            hot_topic.teaser_data(user, stream_id_map) for hot_topic in hot_topics
+            get_teaser_data(hot_topic, user) for hot_topic in hot_topics
         ]
 
         # Gather new streams.
@@ -12,7 +12,7 @@ import os
 import shutil
 import subprocess
 import tempfile
-from collections.abc import Callable, Iterable, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from contextlib import suppress
 from datetime import datetime
 from functools import cache
@@ -1124,8 +1124,13 @@ def custom_fetch_realm_audit_logs_for_user(response: TableData, context: Context
 
 
 def fetch_reaction_data(response: TableData, message_ids: set[int]) -> None:
-    query = Reaction.objects.filter(message_id__in=list(message_ids))
-    response["zerver_reaction"] = make_raw(list(query))
+    # Fetch in chunks, so that we neither send the database a query
+    # with millions of parameters nor hold a Django object for every
+    # reaction in the realm at once.
+    rows: list[Record] = []
+    for message_id_chunk in chunkify(sorted(message_ids), MESSAGE_BATCH_CHUNK_SIZE):
+        rows += make_raw(Reaction.objects.filter(message_id__in=message_id_chunk).order_by("id"))
+    response["zerver_reaction"] = rows
 
 
 def custom_fetch_direct_message_groups(response: TableData, context: Context) -> None:
@@ -1454,7 +1459,7 @@ def export_partial_message_files(
 def write_message_partials(
     *,
     realm: Realm,
-    message_id_chunks: list[list[int]],
+    message_id_chunks: Iterable[list[int]],
     output_dir: Path,
     user_profile_ids: set[int],
 ) -> None:
@@ -2288,19 +2293,13 @@ def get_id_list_gently_from_database(*, base_query: Any, id_field: str) -> list[
     return all_ids
 
 
-def chunkify(lst: list[int], chunk_size: int) -> list[list[int]]:
-    # chunkify([1,2,3,4,5], 2) == [[1,2], [3,4], [5]]
-    result = []
-    i = 0
-    while True:
-        chunk = lst[i : i + chunk_size]
-        if len(chunk) == 0:
-            break
-        else:
-            result.append(chunk)
-            i += chunk_size
-
-    return result
+def chunkify(lst: list[int], chunk_size: int) -> Iterator[list[int]]:
+    # list(chunkify([1,2,3,4,5], 2)) == [[1,2], [3,4], [5]]
+    #
+    # This is a generator, so that callers walking millions of ids
+    # only ever hold one chunk's copy of them at a time.
+    for i in range(0, len(lst), chunk_size):
+        yield lst[i : i + chunk_size]
 
 
 def export_messages_single_user(
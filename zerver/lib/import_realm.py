@@ -2,6 +2,7 @@ import collections
 import logging
 import os
 import shutil
+import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timezone
 from typing import Any
@@ -27,6 +28,7 @@ from zerver.lib.bulk_create import bulk_set_users_or_streams_recipient_fields
 from zerver.lib.export import DATE_FIELDS, Field, Path, Record, TableData, TableName
 from zerver.lib.markdown import markdown_convert
 from zerver.lib.markdown import version as markdown_version
+from zerver.lib.mention import MentionBackend, MentionData
 from zerver.lib.message import get_last_message_id
 from zerver.lib.mime_types import guess_type
 from zerver.lib.partial import partial
@@ -343,6 +345,11 @@ def fix_message_rendered_content(
     """
     This function sets the rendered_content of the messages we're importing.
     """
+    # None of these messages are rendered with a sender (see below),
+    # so it's safe to share one MentionBackend, and its caches of
+    # mentioned users and channels, across the whole batch.
+    mention_backend = MentionBackend(realm.id)
+
     for message in messages:
         if message[rendered_content_key] is not None:
             # For Zulip->Zulip imports, we use the original rendered
@@ -410,6 +417,7 @@ def fix_message_rendered_content(
                 message_realm=realm,
                 sent_by_bot=sent_by_bot,
                 translate_emoticons=translate_emoticons,
+                mention_data=MentionData(mention_backend, content, message_sender=None),
             ).rendered_content
 
             message[rendered_content_key] = rendered_content
@@ -702,7 +710,6 @@ def update_model_ids(model: Any, data: TableData, related_table: TableName) -> N
 def bulk_import_user_message_data(data: TableData, dump_file_id: int) -> None:
     model = UserMessage
     table = "zerver_usermessage"
-    lst = data[table]
 
     # IMPORTANT NOTE: We do not use any primary id
     # data from either the import itself or ID_MAP.
@@ -710,6 +717,19 @@ def bulk_import_user_message_data(data: TableData, dump_file_id: int) -> None:
     # no tables use user_message.id as a foreign key,
     # so we can safely avoid all re-mapping complexity.
 
+    # The messages in this dump file were all just created with newly
+    # allocated ids, so none of these rows can already exist, and
+    # bulk_insert_ums can load them with COPY.  COPY has no
+    # equivalent of ON CONFLICT DO NOTHING, so we drop any duplicate
+    # rows (which third-party converters may generate) here instead.
+    seen: set[tuple[int, int]] = set()
+    lst = []
+    for item in data[table]:
+        key = (item["user_profile_id"], item["message_id"])
+        if key not in seen:
+            seen.add(key)
+            lst.append(item)
+
     def process_batch(items: list[dict[str, Any]]) -> None:
         ums = [
             UserMessageLite(
@@ -719,7 +739,7 @@ def bulk_import_user_message_data(data: TableData, dump_file_id: int) -> None:
             )
             for item in items
         ]
-        bulk_insert_ums(ums)
+        bulk_insert_ums(ums, new_messages=True)
 
     chunk_size = 10000
 
@@ -1107,6 +1127,7 @@ def do_import_realm(import_dir: Path, subdomain: str, processes: int = 1) -> Rea
         create_internal_realm()
 
     logging.info("Importing realm data from %s", realm_data_filename)
+    start = time.monotonic()
     with open(realm_data_filename, "rb") as f:
         data = orjson.loads(f.read())
 
@@ -1527,7 +1548,10 @@ def do_import_realm(import_dir: Path, subdomain: str, processes: int = 1) -> Rea
     update_model_ids(CustomProfileFieldValue, data, related_table="customprofilefieldvalue")
     bulk_import_model(data, CustomProfileFieldValue)
 
+    logging.info("Imported realm tables in %.1fs", time.monotonic() - start)
+
     # Import uploaded files and avatars
+    start = time.monotonic()
     import_uploads(
         realm,
         os.path.join(import_dir, "avatars"),
@@ -1562,6 +1586,8 @@ def do_import_realm(import_dir: Path, subdomain: str, processes: int = 1) -> Rea
             processing_realm_icons=True,
         )
 
+    logging.info("Imported uploads in %.1fs", time.monotonic() - start)
+
     sender_map = {user["id"]: user for user in data["zerver_userprofile"]}
 
     # TODO: de-dup how we read these json files.
@@ -1577,7 +1603,9 @@ def do_import_realm(import_dir: Path, subdomain: str, processes: int = 1) -> Rea
     map_messages_to_attachments(attachment_data)
 
     # Import zerver_message and zerver_usermessage
+    start = time.monotonic()
     import_message_data(realm=realm, sender_map=sender_map, import_dir=import_dir)
+    logging.info("Imported messages in %.1fs", time.monotonic() - start)
 
     if "zerver_onboardingusermessage" in data:
         fix_bitfield_keys(data, "zerver_onboardingusermessage", "flags")
@@ -1648,12 +1676,16 @@ def do_import_realm(import_dir: Path, subdomain: str, processes: int = 1) -> Rea
 
     # Do attachments AFTER message data is loaded.
     logging.info("Importing attachment data from %s", attachments_file)
+    start = time.monotonic()
     import_attachments(attachment_data)
+    logging.info("Imported attachment data in %.1fs", time.monotonic() - start)
 
     # Import the analytics file.
+    start = time.monotonic()
     import_analytics_data(
         realm=realm, import_dir=import_dir, crossrealm_user_ids=crossrealm_user_ids
     )
+    logging.info("Imported analytics data in %.1fs", time.monotonic() - start)
 
     if settings.BILLING_ENABLED:
         do_change_realm_plan_type(realm, Realm.PLAN_TYPE_LIMITED, acting_user=None)
@@ -1831,6 +1831,20 @@ def prepare_linkifier_pattern(source: str) -> str:
     return rf"""(?P<{BEFORE_CAPTURE_GROUP}>^|\s|{next_line}|\pZ|['"\(,:<])(?P<{OUTER_CAPTURE_GROUP}>{source})(?P<{AFTER_CAPTURE_GROUP}>$|[^\pL\pN])"""
 
 
+@lru_cache(maxsize=4096)
+def get_compiled_linkifier_pattern(source: str) -> Any:
+    """Compiles a linkifier pattern, as prepared by
+    prepare_linkifier_pattern.  Compiled patterns are shared between
+    all the Markdown engines in this process, and with topic_links,
+    so that rebuilding an engine for a realm doesn't recompile the
+    patterns of linkifiers which didn't change."""
+    # Do not write errors to stderr (this still raises exceptions)
+    options = re2.Options()
+    options.log_errors = False
+
+    return re2.compile(prepare_linkifier_pattern(source), options=options)
+
+
 # Given a regular expression pattern, linkifies groups that match it
 # using the provided format string to construct the URL.
 class LinkifierPattern(CompiledInlineProcessor):
@@ -1842,11 +1856,7 @@ class LinkifierPattern(CompiledInlineProcessor):
         url_template: str,
         zmd: "ZulipMarkdown",
     ) -> None:
-        # Do not write errors to stderr (this still raises exceptions)
-        options = re2.Options()
-        options.log_errors = False
-
-        compiled_re2 = re2.compile(prepare_linkifier_pattern(source_pattern), options=options)
+        compiled_re2 = get_compiled_linkifier_pattern(source_pattern)
 
         self.prepared_url_template = uri_template.URITemplate(url_template)
 
@@ -2388,11 +2398,17 @@ class ZulipMarkdown(markdown.Markdown):
             )
 
 
+# Markdown engines are kept in least-recently-used order, and bounded
+# in number, so that a process which renders messages for thousands
+# of realms doesn't keep an engine, or the linkifiers used to build
+# it, for every one of them.
+MAX_MD_ENGINES = 256
 md_engines: dict[tuple[int, bool], ZulipMarkdown] = {}
 linkifier_data: dict[int, list[LinkifierDict]] = {}
 
 
 def make_md_engine(linkifiers_key: int, email_gateway: bool) -> None:
+    global markdown_engines_created
     md_engine_key = (linkifiers_key, email_gateway)
     if md_engine_key in md_engines:
         del md_engines[md_engine_key]
@@ -2403,6 +2419,13 @@ def make_md_engine(linkifiers_key: int, email_gateway: bool) -> None:
         linkifiers_key=linkifiers_key,
         email_gateway=email_gateway,
     )
+    markdown_engines_created += 1
+
+    while len(md_engines) > MAX_MD_ENGINES:
+        evicted_linkifiers_key, evicted_email_gateway = next(iter(md_engines))
+        del md_engines[(evicted_linkifiers_key, evicted_email_gateway)]
+        if (evicted_linkifiers_key, not evicted_email_gateway) not in md_engines:
+            linkifier_data.pop(evicted_linkifiers_key, None)
 
 
 # Split the topic name into multiple sections so that we can easily use
@@ -2442,13 +2465,11 @@ def topic_links(linkifiers_key: int, topic_name: str) -> list[dict[str, str]]:
     linkifiers = linkifiers_for_realm(linkifiers_key)
     precedence = 0
 
-    options = re2.Options()
-    options.log_errors = False
     for linkifier in linkifiers:
         raw_pattern = linkifier["pattern"]
         prepared_url_template = uri_template.URITemplate(linkifier["url_template"])
         try:
-            pattern = re2.compile(prepare_linkifier_pattern(raw_pattern), options=options)
+            pattern = get_compiled_linkifier_pattern(raw_pattern)
         except re2.error:
             # An invalid regex shouldn't be possible here, and logging
             # here on an invalid regex would spam the logs with every
@@ -2557,6 +2578,11 @@ def maybe_update_markdown_engines(linkifiers_key: int, email_gateway: bool) -> N
     if (linkifiers_key, email_gateway) not in md_engines:
         # Markdown engine corresponding to this key doesn't exists so create one.
         make_md_engine(linkifiers_key, email_gateway)
+    else:
+        # Mark the engine as most recently used.
+        md_engines[(linkifiers_key, email_gateway)] = md_engines.pop(
+            (linkifiers_key, email_gateway)
+        )
 
 
 # We want to log Markdown parser failures, but shouldn't log the actual input
@@ -2724,6 +2750,7 @@ def do_convert(
 markdown_time_start = 0.0
 markdown_total_time = 0.0
 markdown_total_requests = 0
+markdown_engines_created = 0
 
 
 def get_markdown_time() -> float:
@@ -2734,6 +2761,10 @@ def get_markdown_requests() -> int:
     return markdown_total_requests
 
 
+def get_markdown_engines_created() -> int:
+    return markdown_engines_created
+
+
 def markdown_stats_start() -> None:
     global markdown_time_start
     markdown_time_start = time.time()
@@ -102,6 +102,10 @@ class MentionBackend:
         if unseen_user_filters:
             q_list = [user_filter.Q() for user_filter in unseen_user_filters]
 
+            # Uses index: upper_userprofile_full_name_idx (for name
+            # mentions) and zerver_userprofile_pkey (for id mentions);
+            # each candidate is looked up directly, rather than by
+            # scanning every user in the realm.
             rows = (
                 UserProfile.objects.filter(
                     Q(realm_id=self.realm_id) | Q(email__in=settings.CROSS_REALM_BOT_EMAILS),
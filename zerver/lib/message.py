@@ -29,7 +29,7 @@ from zerver.lib.stream_subscription import (
 from zerver.lib.streams import can_access_stream_history, get_web_public_streams_queryset
 from zerver.lib.topic import MESSAGE__TOPIC, TOPIC_NAME, messages_for_topic
 from zerver.lib.types import UserDisplayRecipient
-from zerver.lib.user_groups import is_user_in_group
+from zerver.lib.user_groups import get_recursive_membership_groups
 from zerver.lib.user_topics import build_get_topic_visibility_policy, get_topic_visibility_policy
 from zerver.lib.users import get_inaccessible_user_ids
 from zerver.models import (
@@ -633,7 +633,18 @@ def extract_unread_data_from_um_rows(
 
     get_topic_visibility_policy = build_get_topic_visibility_policy(user_profile)
 
+    # Users with large unread backlogs tend to have many unread
+    # messages in each topic, so we only compute whether each topic is
+    # muted once.
+    topic_muted_cache: dict[tuple[int, str], bool] = {}
+
     def is_row_muted(stream_id: int, recipient_id: int, topic_name: str) -> bool:
+        key = (recipient_id, topic_name)
+        if key not in topic_muted_cache:
+            topic_muted_cache[key] = is_topic_muted(stream_id, recipient_id, topic_name)
+        return topic_muted_cache[key]
+
+    def is_topic_muted(stream_id: int, recipient_id: int, topic_name: str) -> bool:
         stream_muted = stream_id in muted_stream_ids
         visibility_policy = get_topic_visibility_policy(recipient_id, topic_name)
 
@@ -665,6 +676,15 @@ def extract_unread_data_from_um_rows(
         direct_message_group_cache[recipient_id] = user_ids_string
         return user_ids_string
 
+    # Hoisted out of the loop below, since combining a BitField flag
+    # with an integer is surprisingly expensive, and this may run
+    # for up to MAX_UNREAD_MESSAGES rows.
+    mentioned_mask = UserMessage.flags.mentioned.mask
+    wildcard_mentioned_mask = (
+        UserMessage.flags.stream_wildcard_mentioned.mask
+        | UserMessage.flags.topic_wildcard_mentioned.mask
+    )
+
     for row in rows:
         total_unreads += 1
         message_id = row["message_id"]
@@ -699,16 +719,9 @@ def extract_unread_data_from_um_rows(
             )
 
         # TODO: Add support for alert words here as well.
-        is_mentioned = (row["flags"] & UserMessage.flags.mentioned) != 0
-        is_stream_wildcard_mentioned = (
-            row["flags"] & UserMessage.flags.stream_wildcard_mentioned
-        ) != 0
-        is_topic_wildcard_mentioned = (
-            row["flags"] & UserMessage.flags.topic_wildcard_mentioned
-        ) != 0
-        if is_mentioned:
+        if row["flags"] & mentioned_mask:
             mentions.add(message_id)
-        if is_stream_wildcard_mentioned or is_topic_wildcard_mentioned:
+        if row["flags"] & wildcard_mentioned_mask:
             if msg_type == Recipient.STREAM:
                 stream_id = row["message__recipient__type_id"]
                 topic_name = row[MESSAGE__TOPIC]
@@ -1209,6 +1222,9 @@ def check_user_group_mention_allowed(sender: UserProfile, user_group_ids: list[i
     )
     sender_is_system_bot = is_cross_realm_bot_email(sender.delivery_email)
 
+    # Fetched at most once, so that a message mentioning many groups
+    # doesn't run a recursive membership query per group.
+    sender_recursive_group_ids: set[int] | None = None
     for group in user_groups:
         can_mention_group = group.can_mention_group
         if (
@@ -1223,7 +1239,11 @@ def check_user_group_mention_allowed(sender: UserProfile, user_group_ids: list[i
                 )
             )
 
-        if not is_user_in_group(can_mention_group, sender, direct_member_only=False):
+        if sender_recursive_group_ids is None:
+            sender_recursive_group_ids = set(
+                get_recursive_membership_groups(sender).values_list("id", flat=True)
+            )
+        if can_mention_group.id not in sender_recursive_group_ids:
             raise JsonableError(
                 _("You are not allowed to mention user group '{user_group_name}'.").format(
                     user_group_name=group.name
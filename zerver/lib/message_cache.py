@@ -3,6 +3,7 @@ import zlib
 from collections.abc import Iterable
 from datetime import datetime
 from email.headerregistry import Address
+from itertools import islice
 from typing import Any, TypedDict
 
 import orjson
@@ -78,20 +79,29 @@ def message_to_encoded_cache(message: Message, realm_id: int | None = None) -> b
     return MessageDict.messages_to_encoded_cache([message], realm_id)[message.id]
 
 
+# Moving a large topic updates the cache entries of every moved
+# message; we encode and store them in batches of this size, so that
+# the reaction and submessage queries, the encoded messages, and the
+# memcached request all stay bounded in size.
+UPDATE_MESSAGE_CACHE_BATCH_SIZE = 1000
+
+
 def update_message_cache(
     changed_messages: Iterable[Message], realm_id: int | None = None
 ) -> list[int]:
     """Updates the message as stored in the to_dict cache (for serving
     messages)."""
-    items_for_remote_cache = {}
     message_ids = []
-    changed_messages_to_dict = MessageDict.messages_to_encoded_cache(changed_messages, realm_id)
-    for msg_id, msg in changed_messages_to_dict.items():
-        message_ids.append(msg_id)
-        key = to_dict_cache_key_id(msg_id)
-        items_for_remote_cache[key] = (msg,)
-
-    cache_set_many(items_for_remote_cache)
+    changed_messages_iter = iter(changed_messages)
+    while message_batch := list(islice(changed_messages_iter, UPDATE_MESSAGE_CACHE_BATCH_SIZE)):
+        items_for_remote_cache = {}
+        changed_messages_to_dict = MessageDict.messages_to_encoded_cache(message_batch, realm_id)
+        for msg_id, msg in changed_messages_to_dict.items():
+            message_ids.append(msg_id)
+            key = to_dict_cache_key_id(msg_id)
+            items_for_remote_cache[key] = (msg,)
+
+        cache_set_many(items_for_remote_cache)
     return message_ids
 
 
@@ -190,6 +200,9 @@ class MessageDict:
         MessageDict.bulk_hydrate_sender_info(objs)
         MessageDict.bulk_hydrate_recipient_info(objs)
 
+        # Fetches often contain many messages from the same few senders,
+        # so we compute each sender's avatar URL only once.
+        avatar_urls: dict[tuple[int, bool], str | None] = {}
         for obj in objs:
             can_access_sender = obj.get("can_access_sender", True)
             MessageDict.finalize_payload(
@@ -199,6 +212,7 @@ class MessageDict:
                 skip_copy=True,
                 can_access_sender=can_access_sender,
                 realm_host=realm.host,
+                avatar_urls=avatar_urls,
             )
 
     @staticmethod
@@ -210,11 +224,16 @@ class MessageDict:
         skip_copy: bool = False,
         can_access_sender: bool = True,
         realm_host: str = "",
+        avatar_urls: dict[tuple[int, bool], str | None] | None = None,
     ) -> dict[str, Any]:
         """
         By default, we make a shallow copy of the incoming dict to avoid
         mutation-related bugs.  Code paths that are passing a unique object
         can pass skip_copy=True to avoid this extra work.
+
+        Callers finalizing a batch of messages can pass the same
+        avatar_urls dict for each of them, to memoize the sender's
+        avatar URL across the batch.
         """
         if not skip_copy:
             obj = copy.copy(obj)
@@ -239,7 +258,15 @@ class MessageDict:
                 username=f"user{sender_id}", domain=get_fake_email_domain(realm_host)
             ).addr_spec
 
-        MessageDict.set_sender_avatar(obj, client_gravatar, can_access_sender)
+        if avatar_urls is None:
+            MessageDict.set_sender_avatar(obj, client_gravatar, can_access_sender)
+        else:
+            avatar_key = (obj["sender_id"], can_access_sender)
+            if avatar_key in avatar_urls:
+                obj["avatar_url"] = avatar_urls[avatar_key]
+            else:
+                MessageDict.set_sender_avatar(obj, client_gravatar, can_access_sender)
+                avatar_urls[avatar_key] = obj["avatar_url"]
         if apply_markdown:
             obj["content_type"] = "text/html"
             obj["content"] = obj["rendered_content"]
@@ -6,7 +6,6 @@ from typing import Any, Generic, TypeAlias, TypeVar
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ValidationError
-from django.db import connection
 from django.utils.translation import gettext as _
 from pydantic import BaseModel, model_validator
 from sqlalchemy.dialects import postgresql
@@ -781,7 +780,23 @@ class NarrowBuilder:
     def _by_search_tsearch(
         self, query: Select, operand: str, maybe_negate: ConditionTransform
     ) -> Select:
-        tsquery = func.plainto_tsquery(literal("zulip.english_us_search"), literal(operand))
+        tsquery: ColumnElement[Any] = func.plainto_tsquery(
+            literal("zulip.english_us_search"), literal(operand)
+        )
+
+        # Do quoted string matching, as phrase search: the words of
+        # each quoted string must also appear in order.  Combining
+        # these into the one tsquery, rather than filtering on the
+        # message content, lets the whole search use the
+        # search_tsvector index, and ignores punctuation and applies
+        # stemming to phrases just as to other search terms.
+        for term in re.findall(r'"[^"]+"|\S+', operand):
+            if term[0] == '"' and term[-1] == '"':
+                phrase_tsquery = func.phraseto_tsquery(
+                    literal("zulip.english_us_search"), literal(term[1:-1])
+                )
+                tsquery = tsquery.op("&&")(phrase_tsquery)
+
         query = query.add_columns(
             ts_locs_array(
                 literal("zulip.english_us_search", Text), column("rendered_content", Text), tsquery
@@ -794,19 +809,6 @@ class NarrowBuilder:
             ).label("topic_matches"),
         )
 
-        # Do quoted string matching.  We really want phrase
-        # search here so we can ignore punctuation and do
-        # stemming, but there isn't a standard phrase search
-        # mechanism in PostgreSQL
-        for term in re.findall(r'"[^"]+"|\S+', operand):
-            if term[0] == '"' and term[-1] == '"':
-                term = term[1:-1]
-                term = "%" + connection.ops.prep_for_like_query(term) + "%"
-                cond: ClauseElement = or_(
-                    column("content", Text).ilike(term), topic_column_sa().ilike(term)
-                )
-                query = query.where(maybe_negate(cond))
-
         cond = column("search_tsvector", postgresql.TSVECTOR).op("@@")(tsquery)
         return query.where(maybe_negate(cond))
 
@@ -994,8 +996,18 @@ def exclude_muting_conditions(
     return conditions
 
 
+def narrow_has_channel_term(narrow: list[NarrowParameter] | None) -> bool:
+    if narrow is None:
+        return False
+    return any(term.operator in channel_operators and not term.negated for term in narrow)
+
+
 def get_base_query_for_search(
-    realm_id: int, user_profile: UserProfile | None, need_message: bool, need_user_message: bool
+    realm_id: int,
+    user_profile: UserProfile | None,
+    need_message: bool,
+    need_user_message: bool,
+    is_channel_narrow: bool = False,
 ) -> tuple[Select, ColumnElement[Integer]]:
     # Handle the simple case where user_message isn't involved first.
     if not need_user_message:
@@ -1027,6 +1039,16 @@ def get_base_query_for_search(
                 )
             )
         )
+        if is_channel_narrow:
+            # Narrows to a single channel are the exception: limiting
+            # by realm_id there lets the query planner walk the
+            # zerver_message_realm_recipient_* indexes (including the
+            # upper(subject) one, for topic narrows) in message ID
+            # order, and join each row to its UserMessage by primary
+            # key.  Otherwise, scrolling back through the history of a
+            # quiet channel would scan every UserMessage row the user
+            # has received since.
+            query = query.where(column("realm_id", Integer) == literal(realm_id))
         inner_msg_id_col = column("message_id", Integer)
         return (query, inner_msg_id_col)
 
@@ -1103,6 +1125,7 @@ def find_first_unread_anchor(
         user_profile=user_profile,
         need_message=need_message,
         need_user_message=need_user_message,
+        is_channel_narrow=narrow_has_channel_term(narrow),
     )
 
     query, is_search = add_narrow_conditions(
@@ -1378,6 +1401,7 @@ def fetch_messages(
         user_profile=user_profile,
         need_message=need_message,
         need_user_message=need_user_message,
+        is_channel_narrow=narrow_has_channel_term(narrow),
     )
 
     query, is_search = add_narrow_conditions(
@@ -27,9 +27,11 @@ from django.conf import settings
 
 @dataclass
 class NarrowTerm:
-    # In our current use case we don't yet handle negated narrow terms.
     operator: str
     operand: str
+    # The API for registering event queues does not yet accept negated
+    # narrow terms, but build_narrow_predicate supports them.
+    negated: bool = False
 
 
 def narrow_dataclasses_from_tuples(tups: Collection[Sequence[str]]) -> Collection[NarrowTerm]:
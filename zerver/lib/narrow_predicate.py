@@ -1,5 +1,5 @@
-from collections.abc import Collection
-from typing import Any, Protocol
+from collections.abc import Callable, Collection
+from typing import Any, Protocol, TypeAlias
 
 from django.utils.translation import gettext as _
 
@@ -30,6 +30,54 @@ class NarrowPredicate(Protocol):
     def __call__(self, *, message: dict[str, Any], flags: list[str]) -> bool: ...
 
 
+TermPredicate: TypeAlias = Callable[[dict[str, Any], Collection[str]], bool]
+
+
+def build_term_predicate(narrow_term: NarrowTerm) -> TermPredicate | None:
+    """Compiles a single narrow term into a function of (message, flags).
+
+    Operands are normalized here, once, rather than for every message
+    the predicate is checked against.  Returns None for terms that
+    match every message."""
+    operator = narrow_term.operator
+    operand = narrow_term.operand
+    lowered_operand = operand.lower()
+
+    term_predicate: TermPredicate
+    if operator in channel_operators:
+        term_predicate = lambda message, flags: (
+            message["type"] == "stream" and message["display_recipient"].lower() == lowered_operand
+        )
+    elif operator == "topic":
+        term_predicate = lambda message, flags: (
+            message["type"] == "stream"
+            and get_topic_from_message_info(message).lower() == lowered_operand
+        )
+    elif operator == "sender":
+        term_predicate = lambda message, flags: message["sender_email"].lower() == lowered_operand
+    elif operator == "is" and operand in ["dm", "private"]:
+        # "is:private" is a legacy alias for "is:dm"
+        term_predicate = lambda message, flags: message["type"] == "private"
+    elif operator == "is" and operand in ["starred"]:
+        term_predicate = lambda message, flags: operand in flags
+    elif operator == "is" and operand == "unread":
+        term_predicate = lambda message, flags: "read" not in flags
+    elif operator == "is" and operand in ["alerted", "mentioned"]:
+        term_predicate = lambda message, flags: "mentioned" in flags
+    elif operator == "is" and operand == "resolved":
+        term_predicate = lambda message, flags: (
+            message["type"] == "stream"
+            and get_topic_from_message_info(message).startswith(RESOLVED_TOPIC_PREFIX)
+        )
+    else:
+        return None
+
+    if narrow_term.negated:
+        positive_predicate = term_predicate
+        return lambda message, flags: not positive_predicate(message, flags)
+    return term_predicate
+
+
 def build_narrow_predicate(
     narrow: Collection[NarrowTerm],
 ) -> NarrowPredicate:
@@ -37,48 +85,24 @@ def build_narrow_predicate(
     NarrowLibraryTest."""
     check_narrow_for_events(narrow)
 
+    term_predicates = [
+        term_predicate
+        for term_predicate in map(build_term_predicate, narrow)
+        if term_predicate is not None
+    ]
+
     def narrow_predicate(*, message: dict[str, Any], flags: list[str]) -> bool:
-        def satisfies_operator(*, operator: str, operand: str) -> bool:
-            if operator in channel_operators:
-                if message["type"] != "stream":
-                    return False
-                if operand.lower() != message["display_recipient"].lower():
-                    return False
-            elif operator == "topic":
-                if message["type"] != "stream":
-                    return False
-                topic_name = get_topic_from_message_info(message)
-                if operand.lower() != topic_name.lower():
-                    return False
-            elif operator == "sender":
-                if operand.lower() != message["sender_email"].lower():
-                    return False
-            elif operator == "is" and operand in ["dm", "private"]:
-                # "is:private" is a legacy alias for "is:dm"
-                if message["type"] != "private":
-                    return False
-            elif operator == "is" and operand in ["starred"]:
-                if operand not in flags:
-                    return False
-            elif operator == "is" and operand == "unread":
-                if "read" in flags:
-                    return False
-            elif operator == "is" and operand in ["alerted", "mentioned"]:
-                if "mentioned" not in flags:
-                    return False
-            elif operator == "is" and operand == "resolved":
-                if message["type"] != "stream":
-                    return False
-                topic_name = get_topic_from_message_info(message)
-                if not topic_name.startswith(RESOLVED_TOPIC_PREFIX):
-                    return False
-            return True
-
-        for narrow_term in narrow:
-            # TODO: Eventually handle negated narrow terms.
-            if not satisfies_operator(operator=narrow_term.operator, operand=narrow_term.operand):
-                return False
-
-        return True
+        return all(term_predicate(message, flags) for term_predicate in term_predicates)
 
     return narrow_predicate
+
+
+def get_narrow_channel_name(narrow: Collection[NarrowTerm]) -> str | None:
+    """Returns the lowercased name of the channel that any message
+    matching the narrow must have been sent to, if the narrow restricts
+    messages to a single channel.  Tornado uses this to only check
+    narrowed event queues that could possibly match a channel message."""
+    for narrow_term in narrow:
+        if narrow_term.operator in channel_operators and not narrow_term.negated:
+            return narrow_term.operand.lower()
+    return None
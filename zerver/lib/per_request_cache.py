@@ -1,6 +1,8 @@
 from collections.abc import Callable
 from typing import Any, TypeVar
 
+from zerver.lib.cache import check_in_process_cache_generation
+
 ReturnT = TypeVar("ReturnT")
 
 FUNCTION_NAME_TO_PER_REQUEST_RESULT: dict[str, dict[int, Any]] = {}
@@ -31,3 +33,7 @@ def flush_per_request_cache(cache_key: str) -> None:
 def flush_per_request_caches() -> None:
     for cache_key in FUNCTION_NAME_TO_PER_REQUEST_RESULT:
         FUNCTION_NAME_TO_PER_REQUEST_RESULT[cache_key] = {}
+
+    # Values in the in-process cache can similarly only be stale
+    # until the end of a request.
+    check_in_process_cache_generation()
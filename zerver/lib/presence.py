@@ -7,9 +7,17 @@ from typing import Any
 from django.conf import settings
 from django.utils.timezone import now as timezone_now
 
+from zerver.lib.cache import (
+    cache_get_generation,
+    cache_get_many,
+    cache_set,
+    realm_presence_generation_cache_key,
+    realm_presence_last_update_id_cache_key,
+)
 from zerver.lib.timestamp import datetime_to_timestamp
 from zerver.lib.users import check_user_can_access_all_users, get_accessible_user_ids
 from zerver.models import Realm, UserPresence, UserProfile
+from zerver.models.presence import PresenceSequence
 
 
 def get_presence_dicts_for_rows(
@@ -147,6 +155,44 @@ def get_presence_for_user(
     return get_presence_dicts_for_rows(presence_rows, slim_presence)
 
 
+# Bounds how long a realm's cached last_update_id can be trusted, in
+# case the generation bump after a presence update is lost because
+# memcached was briefly unreachable.
+REALM_PRESENCE_LAST_UPDATE_ID_CACHE_TIMEOUT = 60
+
+
+def get_realm_presence_last_update_id(realm_id: int) -> int:
+    """Returns the latest last_update_id committed in the realm, from
+    memcached when possible.
+
+    The cached value is tagged with the realm's presence generation,
+    which do_update_user_presence bumps after every presence update
+    commits, and is only used while that generation is current.  We
+    read the generation before the database, so a value cached
+    concurrently with an update is at worst tagged with a generation
+    that is already stale; it can never be current and too low.
+    """
+    generation_key = realm_presence_generation_cache_key(realm_id)
+    last_update_id_key = realm_presence_last_update_id_cache_key(realm_id)
+    cached = cache_get_many([generation_key, last_update_id_key])
+    generation = cached.get(generation_key)
+    if generation is None:
+        generation = cache_get_generation(generation_key)
+    elif last_update_id_key in cached:
+        (cached_generation, cached_last_update_id) = cached[last_update_id_key][0]
+        if cached_generation == generation:
+            return cached_last_update_id
+
+    last_update_id = PresenceSequence.objects.get(realm_id=realm_id).last_update_id
+    if generation is not None:
+        cache_set(
+            last_update_id_key,
+            (generation, last_update_id),
+            timeout=REALM_PRESENCE_LAST_UPDATE_ID_CACHE_TIMEOUT,
+        )
+    return last_update_id
+
+
 def get_presence_dict_by_realm(
     realm: Realm,
     slim_presence: bool = False,
@@ -156,6 +202,15 @@ def get_presence_dict_by_realm(
     two_weeks_ago = timezone_now() - timedelta(weeks=2)
     kwargs: dict[str, object] = dict()
     if last_update_id_fetched_by_client is not None:
+        # Most presence polls in a quiet realm find no changes; we can
+        # answer those without querying UserPresence if the client has
+        # already seen the realm's latest last_update_id.  (Clients
+        # pass -1 to fetch all the presence data.)
+        if (
+            last_update_id_fetched_by_client >= 0
+            and get_realm_presence_last_update_id(realm.id) <= last_update_id_fetched_by_client
+        ):
+            return {}, last_update_id_fetched_by_client
         kwargs["last_update_id__gt"] = last_update_id_fetched_by_client
 
     query = UserPresence.objects.filter(
@@ -1,7 +1,7 @@
 from collections import defaultdict
 from collections.abc import MutableMapping
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from django.conf import settings
 from django.http import HttpRequest, HttpResponse
@@ -16,6 +16,9 @@ from zerver.models import Client, Realm
 if settings.ZILENCER_ENABLED:
     from zilencer.models import RemoteZulipServer
 
+if TYPE_CHECKING:
+    from zerver.lib.message import SendMessageRequest
+
 
 @dataclass
 class RequestNotes(BaseNotes[HttpRequest, "RequestNotes"]):
@@ -50,6 +53,9 @@ class RequestNotes(BaseNotes[HttpRequest, "RequestNotes"]):
     processed_parameters: set[str] = field(default_factory=set)
     remote_server: Optional["RemoteZulipServer"] = None
     is_webhook_view: bool = False
+    # Messages from check_send_webhook_message waiting to be sent together;
+    # None outside of webhook_view.
+    webhook_messages: list["SendMessageRequest"] | None = None
 
     @classmethod
     @override
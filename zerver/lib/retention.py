@@ -189,6 +189,18 @@ def move_expired_messages_to_archive_by_recipient(
     chunk_size: int = MESSAGE_BATCH_SIZE,
 ) -> int:
     assert message_retention_days != -1
+    check_date = timezone_now() - timedelta(days=message_retention_days)
+
+    # Most streams have no newly expired messages on any given run,
+    # since they were archived by the previous run.  Checking for that
+    # with a cheap read lets us skip creating (and then deleting) an
+    # ArchiveTransaction for each of them.
+    #
+    # Uses index: zerver_message_realm_recipient_date_sent
+    if not Message.objects.filter(
+        realm_id=realm.id, recipient_id=recipient.id, date_sent__lt=check_date
+    ).exists():
+        return 0
 
     # Uses index: zerver_message_realm_recipient_date_sent
     query = SQL(
@@ -204,7 +216,6 @@ def move_expired_messages_to_archive_by_recipient(
     RETURNING id
     """
     )
-    check_date = timezone_now() - timedelta(days=message_retention_days)
 
     return run_archiving_in_chunks(
         query,
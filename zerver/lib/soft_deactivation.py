@@ -1,5 +1,6 @@
 # Documented in https://zulip.readthedocs.io/en/latest/subsystems/sending-messages.html#soft-deactivation
 import logging
+import time
 from collections import defaultdict
 from collections.abc import Iterable, Sequence
 from typing import Any, TypedDict
@@ -110,7 +111,7 @@ def filter_by_subscription_history(
     return sorted(message_ids)
 
 
-def add_missing_messages(user_profile: UserProfile) -> None:
+def add_missing_messages(user_profile: UserProfile) -> int:
     """This function takes a soft-deactivated user, and computes and adds
     to the database any UserMessage rows that were not created while
     the user was soft-deactivated.  The end result is that from the
@@ -144,6 +145,10 @@ def add_missing_messages(user_profile: UserProfile) -> None:
 
     * Create the UserMessage rows.
 
+    The candidate messages are processed in batches of
+    BULK_CREATE_BATCH_SIZE message IDs.  Returns the number of
+    UserMessage rows created.
+
     For further documentation, see:
 
       https://zulip.readthedocs.io/en/latest/subsystems/sending-messages.html#soft-deactivation
@@ -203,50 +208,62 @@ def add_missing_messages(user_profile: UserProfile) -> None:
                 continue
         recipient_ids.append(sub["recipient_id"])
 
-    new_stream_msgs = (
-        Message.objects.alias(
-            has_user_message=Exists(
-                UserMessage.objects.filter(
-                    user_profile_id=user_profile,
-                    message_id=OuterRef("id"),
+    # We walk the candidate messages in batches of message IDs, rather
+    # than loading them all at once, so that catching up a user who
+    # missed a very large number of messages uses bounded memory.
+    # Each batch records its progress in last_active_message_id, so
+    # an interrupted catch-up resumes where it left off.
+    messages_added = 0
+    last_message_id = user_profile.last_active_message_id
+    while True:
+        new_stream_msgs = list(
+            Message.objects.alias(
+                has_user_message=Exists(
+                    UserMessage.objects.filter(
+                        user_profile_id=user_profile,
+                        message_id=OuterRef("id"),
+                    )
                 )
             )
+            .filter(
+                # Uses index: zerver_message_realm_recipient_id
+                has_user_message=False,
+                realm_id=user_profile.realm_id,
+                recipient_id__in=recipient_ids,
+                id__gt=last_message_id,
+            )
+            .order_by("id")
+            .values("id", "recipient__type_id")[:BULK_CREATE_BATCH_SIZE]
         )
-        .filter(
-            # Uses index: zerver_message_realm_recipient_id
-            has_user_message=False,
-            realm_id=user_profile.realm_id,
-            recipient_id__in=recipient_ids,
-            id__gt=user_profile.last_active_message_id,
-        )
-        .order_by("id")
-        .values("id", "recipient__type_id")
-    )
+        if len(new_stream_msgs) == 0:
+            break
+        last_message_id = new_stream_msgs[-1]["id"]
+
+        stream_messages: defaultdict[int, list[MissingMessageDict]] = defaultdict(list)
+        for msg in new_stream_msgs:
+            stream_messages[msg["recipient__type_id"]].append(
+                MissingMessageDict(id=msg["id"], recipient__type_id=msg["recipient__type_id"])
+            )
 
-    stream_messages: defaultdict[int, list[MissingMessageDict]] = defaultdict(list)
-    for msg in new_stream_msgs:
-        stream_messages[msg["recipient__type_id"]].append(
-            MissingMessageDict(id=msg["id"], recipient__type_id=msg["recipient__type_id"])
+        # Calling this function to filter out stream messages based upon
+        # subscription logs and then store all UserMessage objects for bulk insert
+        # This function does not perform any SQL related task and gets all the data
+        # required for its operation in its params.
+        message_ids = filter_by_subscription_history(
+            user_profile, stream_messages, all_stream_subscription_logs
         )
 
-    # Calling this function to filter out stream messages based upon
-    # subscription logs and then store all UserMessage objects for bulk insert
-    # This function does not perform any SQL related task and gets all the data
-    # required for its operation in its params.
-    message_ids_to_insert = filter_by_subscription_history(
-        user_profile, stream_messages, all_stream_subscription_logs
-    )
+        if len(message_ids) > 0:
+            bulk_insert_all_ums(user_ids=[user_profile.id], message_ids=message_ids, flags=0)
+            UserProfile.objects.filter(id=user_profile.id).update(
+                last_active_message_id=Greatest(F("last_active_message_id"), message_ids[-1])
+            )
+            messages_added += len(message_ids)
 
-    # Doing a bulk create for all the UserMessage objects stored for creation.
-    while len(message_ids_to_insert) > 0:
-        message_ids, message_ids_to_insert = (
-            message_ids_to_insert[0:BULK_CREATE_BATCH_SIZE],
-            message_ids_to_insert[BULK_CREATE_BATCH_SIZE:],
-        )
-        bulk_insert_all_ums(user_ids=[user_profile.id], message_ids=message_ids, flags=0)
-        UserProfile.objects.filter(id=user_profile.id).update(
-            last_active_message_id=Greatest(F("last_active_message_id"), message_ids[-1])
-        )
+        if len(new_stream_msgs) < BULK_CREATE_BATCH_SIZE:
+            break
+
+    return messages_added
 
 
 def do_soft_deactivate_user(user_profile: UserProfile) -> None:
@@ -369,7 +386,14 @@ def do_catch_up_soft_deactivated_users(users: Iterable[UserProfile]) -> list[Use
     for user_profile in users:
         if user_profile.long_term_idle:
             try:
-                add_missing_messages(user_profile)
+                start = time.monotonic()
+                messages_added = add_missing_messages(user_profile)
+                logger.debug(
+                    "Caught up user %s with %d messages in %.3fs",
+                    user_profile.id,
+                    messages_added,
+                    time.monotonic() - start,
+                )
                 users_caught_up.append(user_profile)
             except Exception:  # nocoverage
                 capture_exception()  # nocoverage
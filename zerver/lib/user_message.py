@@ -1,3 +1,5 @@
+from io import StringIO
+
 from django.db import connection
 from psycopg2.extras import execute_values
 from psycopg2.sql import SQL, Composable, Literal
@@ -49,16 +51,39 @@ def create_historical_user_messages(
     bulk_insert_all_ums([user_id], message_ids, flags, conflict)
 
 
-def bulk_insert_ums(ums: list[UserMessageLite]) -> None:
+# Batches at least this large are written using COPY when possible;
+# below it, the INSERT is cheap enough that it doesn't matter.
+BULK_COPY_UMS_THRESHOLD = 1000
+
+
+def bulk_insert_ums(ums: list[UserMessageLite], *, new_messages: bool = False) -> None:
     """
     Doing bulk inserts this way is much faster than using Django,
     since we don't have any ORM overhead.  Profiling with 1000
     users shows a speedup of 0.436 -> 0.027 seconds, so we're
     talking about a 15x speedup.
+
+    Callers should pass new_messages=True if none of these rows can
+    already exist, e.g. because the messages were created in the
+    current transaction.  Large batches are then streamed to the
+    database with COPY, which avoids having PostgreSQL parse a
+    multi-megabyte INSERT statement for a message to a large channel;
+    COPY has no equivalent of ON CONFLICT DO NOTHING, so it is only
+    safe in that case.
     """
     if not ums:
         return
 
+    if new_messages and len(ums) >= BULK_COPY_UMS_THRESHOLD:
+        data = StringIO(
+            "".join(f"{um.user_profile_id}\t{um.message_id}\t{int(um.flags)}\n" for um in ums)
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                "COPY zerver_usermessage (user_profile_id, message_id, flags) FROM STDIN", data
+            )
+        return
+
     vals = [(um.user_profile_id, um.message_id, um.flags) for um in ums]
     query = SQL(
         """
@@ -11,11 +11,11 @@ from pydantic import Json
 from typing_extensions import override
 
 from zerver.actions.message_send import (
-    check_send_private_message,
-    check_send_stream_message,
-    check_send_stream_message_by_id,
+    check_message,
+    do_send_messages,
     send_rate_limited_pm_notification_to_bot_owner,
 )
+from zerver.lib.addressee import Addressee
 from zerver.lib.exceptions import (
     AnomalousWebhookPayloadError,
     ErrorCode,
@@ -116,11 +116,12 @@ def check_send_webhook_message(
     ):
         return
 
-    client = RequestNotes.get_notes(request).client
+    request_notes = RequestNotes.get_notes(request)
+    client = request_notes.client
     assert client is not None
     if stream is None:
         assert user_profile.bot_owner is not None
-        check_send_private_message(user_profile, client, user_profile.bot_owner, body)
+        addressee = Addressee.for_user_profile(user_profile.bot_owner)
     else:
         # Some third-party websites (such as Atlassian's Jira), tend to
         # double escape their URLs in a manner that escaped space characters
@@ -134,17 +135,41 @@ def check_send_webhook_message(
             if unquote_url_parameters:
                 topic = unquote(topic)
 
-        try:
-            if stream.isdecimal():
-                check_send_stream_message_by_id(user_profile, client, int(stream), topic, body)
-            else:
-                check_send_stream_message(user_profile, client, stream, topic, body)
-        except StreamDoesNotExistError:
-            # A direct message will be sent to the bot_owner by check_message,
-            # notifying that the webhook bot just tried to send a message to a
-            # non-existent stream, so we don't need to re-raise it since it
-            # clutters up webhook-errors.log
-            pass
+        if stream.isdecimal():
+            addressee = Addressee.for_stream_id(int(stream), topic)
+        else:
+            addressee = Addressee.for_stream_name(stream, topic)
+
+    try:
+        message = check_message(user_profile, client, addressee, body)
+    except StreamDoesNotExistError:
+        # A direct message will be sent to the bot_owner by check_message,
+        # notifying that the webhook bot just tried to send a message to a
+        # non-existent stream, so we don't need to re-raise it since it
+        # clutters up webhook-errors.log
+        return
+
+    if request_notes.webhook_messages is not None:
+        # Inside webhook_view, the messages generated by a single
+        # incoming payload are sent together by send_webhook_messages.
+        request_notes.webhook_messages.append(message)
+    else:
+        do_send_messages([message])
+
+
+def send_webhook_messages(request: HttpRequest) -> None:
+    """Sends the messages that check_send_webhook_message accumulated
+    while processing this request.
+
+    Payloads which generate several messages (e.g. a push of several
+    branches) are sent in a single do_send_messages call, sharing one
+    database transaction, one bulk UserMessage insert, and one batch
+    of events to Tornado."""
+    request_notes = RequestNotes.get_notes(request)
+    messages = request_notes.webhook_messages
+    request_notes.webhook_messages = None
+    if messages:
+        do_send_messages(messages)
 
 
 def standardize_headers(input_headers: None | dict[str, Any]) -> dict[str, str]:
@@ -25,11 +25,20 @@ from django_scim.settings import scim_settings
 from sentry_sdk import set_tag
 from typing_extensions import ParamSpec, override
 
-from zerver.lib.cache import get_remote_cache_requests, get_remote_cache_time
+from zerver.lib.cache import (
+    get_in_process_cache_hits,
+    get_in_process_cache_requests,
+    get_remote_cache_requests,
+    get_remote_cache_time,
+)
 from zerver.lib.db_connections import reset_queries
 from zerver.lib.debug import maybe_tracemalloc_listen
 from zerver.lib.exceptions import ErrorCode, JsonableError, MissingAuthenticationError, WebhookError
-from zerver.lib.markdown import get_markdown_requests, get_markdown_time
+from zerver.lib.markdown import (
+    get_markdown_engines_created,
+    get_markdown_requests,
+    get_markdown_time,
+)
 from zerver.lib.per_request_cache import flush_per_request_caches
 from zerver.lib.rate_limiter import RateLimitResult
 from zerver.lib.request import RequestNotes
@@ -54,8 +63,11 @@ def record_request_stop_data(log_data: MutableMapping[str, Any]) -> None:
     log_data["time_stopped"] = time.time()
     log_data["remote_cache_time_stopped"] = get_remote_cache_time()
     log_data["remote_cache_requests_stopped"] = get_remote_cache_requests()
+    log_data["in_process_cache_requests_stopped"] = get_in_process_cache_requests()
+    log_data["in_process_cache_hits_stopped"] = get_in_process_cache_hits()
     log_data["markdown_time_stopped"] = get_markdown_time()
     log_data["markdown_requests_stopped"] = get_markdown_requests()
+    log_data["markdown_engines_created_stopped"] = get_markdown_engines_created()
     if settings.PROFILE_ALL_REQUESTS:
         log_data["prof"].disable()
 
@@ -72,8 +84,11 @@ def record_request_restart_data(log_data: MutableMapping[str, Any]) -> None:
     log_data["time_restarted"] = time.time()
     log_data["remote_cache_time_restarted"] = get_remote_cache_time()
     log_data["remote_cache_requests_restarted"] = get_remote_cache_requests()
+    log_data["in_process_cache_requests_restarted"] = get_in_process_cache_requests()
+    log_data["in_process_cache_hits_restarted"] = get_in_process_cache_hits()
     log_data["markdown_time_restarted"] = get_markdown_time()
     log_data["markdown_requests_restarted"] = get_markdown_requests()
+    log_data["markdown_engines_created_restarted"] = get_markdown_engines_created()
 
 
 def async_request_timer_restart(request: HttpRequest) -> None:
@@ -95,8 +110,11 @@ def record_request_start_data(log_data: MutableMapping[str, Any]) -> None:
     log_data["time_started"] = time.time()
     log_data["remote_cache_time_start"] = get_remote_cache_time()
     log_data["remote_cache_requests_start"] = get_remote_cache_requests()
+    log_data["in_process_cache_requests_start"] = get_in_process_cache_requests()
+    log_data["in_process_cache_hits_start"] = get_in_process_cache_hits()
     log_data["markdown_time_start"] = get_markdown_time()
     log_data["markdown_requests_start"] = get_markdown_requests()
+    log_data["markdown_engines_created_start"] = get_markdown_engines_created()
 
 
 def timedelta_ms(timedelta: float) -> float:
@@ -164,6 +182,29 @@ def write_log_line(
                 f" (mem: {format_timedelta(remote_cache_time_delta)}/{remote_cache_count_delta})"
             )
 
+    in_process_cache_output = ""
+    if "in_process_cache_requests_start" in log_data:
+        in_process_cache_count_delta = (
+            get_in_process_cache_requests() - log_data["in_process_cache_requests_start"]
+        )
+        in_process_cache_hits_delta = (
+            get_in_process_cache_hits() - log_data["in_process_cache_hits_start"]
+        )
+        if "in_process_cache_requests_stopped" in log_data:
+            in_process_cache_count_delta += (
+                log_data["in_process_cache_requests_stopped"]
+                - log_data["in_process_cache_requests_restarted"]
+            )
+            in_process_cache_hits_delta += (
+                log_data["in_process_cache_hits_stopped"]
+                - log_data["in_process_cache_hits_restarted"]
+            )
+
+        if in_process_cache_count_delta > 0:
+            in_process_cache_output = (
+                f" (local: {in_process_cache_hits_delta}/{in_process_cache_count_delta})"
+            )
+
     startup_output = ""
     if "startup_time_delta" in log_data and log_data["startup_time_delta"] > 0.005:
         startup_output = " (+start: {})".format(format_timedelta(log_data["startup_time_delta"]))
@@ -172,6 +213,9 @@ def write_log_line(
     if "markdown_time_start" in log_data:
         markdown_time_delta = get_markdown_time() - log_data["markdown_time_start"]
         markdown_count_delta = get_markdown_requests() - log_data["markdown_requests_start"]
+        markdown_engines_created_delta = (
+            get_markdown_engines_created() - log_data["markdown_engines_created_start"]
+        )
         if "markdown_requests_stopped" in log_data:
             # (now - restarted) + (stopped - start) = (now - start) + (stopped - restarted)
             markdown_time_delta += (
@@ -180,11 +224,19 @@ def write_log_line(
             markdown_count_delta += (
                 log_data["markdown_requests_stopped"] - log_data["markdown_requests_restarted"]
             )
+            markdown_engines_created_delta += (
+                log_data["markdown_engines_created_stopped"]
+                - log_data["markdown_engines_created_restarted"]
+            )
 
         if markdown_time_delta > 0.005:
             markdown_output = (
                 f" (md: {format_timedelta(markdown_time_delta)}/{markdown_count_delta})"
             )
+        # Building a Markdown engine is expensive; if this happens
+        # often, MAX_MD_ENGINES may be too small for this server.
+        if markdown_engines_created_delta > 0:
+            markdown_output += f" (md engines: +{markdown_engines_created_delta})"
 
     # Get the amount of time spent doing database queries
     db_time_output = ""
@@ -201,7 +253,7 @@ def write_log_line(
         logger_client = f"({requester_for_logs} via {client_name})"
     else:
         logger_client = f"({requester_for_logs} via {client_name}/{client_version})"
-    logger_timing = f"{format_timedelta(time_delta):>5}{optional_orig_delta}{remote_cache_output}{markdown_output}{db_time_output}{startup_output} {path}"
+    logger_timing = f"{format_timedelta(time_delta):>5}{optional_orig_delta}{remote_cache_output}{in_process_cache_output}{markdown_output}{db_time_output}{startup_output} {path}"
     logger_line = f"{remote_ip:<15} {method:<7} {status_code:3} {logger_timing}{extra_request_data} {logger_client}"
     if status_code in [200, 304] and method == "GET" and path.startswith("/static"):
         logger.debug(logger_line)
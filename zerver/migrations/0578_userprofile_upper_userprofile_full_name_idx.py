@@ -0,0 +1,21 @@
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("zerver", "0577_merge_20240829_0153"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="userprofile",
+            index=models.Index(
+                django.db.models.functions.text.Upper("full_name"),
+                name="upper_userprofile_full_name_idx",
+            ),
+        ),
+    ]
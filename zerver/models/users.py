@@ -617,6 +617,7 @@ class UserProfile(AbstractBaseUser, PermissionsMixin, UserBaseSettings):
     class Meta:
         indexes = [
             models.Index(Upper("email"), name="upper_userprofile_email_idx"),
+            models.Index(Upper("full_name"), name="upper_userprofile_full_name_idx"),
         ]
 
     @override
@@ -1,9 +1,12 @@
 from unittest.mock import Mock, patch
 
 from django.conf import settings
+from django.test import override_settings
 
 from zerver.apps import flush_cache
+from zerver.lib import cache
 from zerver.lib.cache import (
+    IN_PROCESS_CACHE_GENERATION_KEY,
     MEMCACHED_MAX_KEY_LENGTH,
     InvalidCacheKeyError,
     bulk_cached_fetch,
@@ -14,11 +17,16 @@ from zerver.lib.cache import (
     cache_set,
     cache_set_many,
     cache_with_key,
+    get_cache_backend,
+    get_in_process_cache_hits,
+    get_in_process_cache_requests,
+    in_process_cache_invalidated_keys_key,
     safe_cache_get_many,
     safe_cache_set_many,
     user_profile_by_id_cache_key,
     validate_cache_key,
 )
+from zerver.lib.per_request_cache import flush_per_request_caches
 from zerver.lib.test_classes import ZulipTestCase
 from zerver.models import UserProfile
 from zerver.models.realms import get_realm
@@ -243,6 +251,74 @@ def get_user_email(user: UserProfile) -> str:
     return user.email  # nocoverage
 
 
+class InProcessCacheTest(ZulipTestCase):
+    @override_settings(IN_PROCESS_CACHE_SIZE=2)
+    def test_in_process_cache(self) -> None:
+        hamlet = self.example_user("hamlet")
+        cordelia = self.example_user("cordelia")
+        othello = self.example_user("othello")
+        flush_per_request_caches()
+
+        def get_hits_and_requests() -> tuple[int, int]:
+            return (get_in_process_cache_hits(), get_in_process_cache_requests())
+
+        hits, requests = get_hits_and_requests()
+        self.assertEqual(get_user_profile_by_id(hamlet.id), hamlet)
+        self.assertEqual(get_hits_and_requests(), (hits, requests + 1))
+
+        with self.assert_memcached_count(0):
+            cached_hamlet = get_user_profile_by_id(hamlet.id)
+        self.assertEqual(cached_hamlet, hamlet)
+        self.assertEqual(get_hits_and_requests(), (hits + 1, requests + 2))
+        # Each caller gets its own copy of the cached object.
+        self.assertIsNot(get_user_profile_by_id(hamlet.id), cached_hamlet)
+
+        # Changes in this process are seen immediately.
+        hamlet.full_name = "Prince Hamlet"
+        hamlet.save(update_fields=["full_name"])
+        self.assertEqual(get_user_profile_by_id(hamlet.id).full_name, "Prince Hamlet")
+        get_user_profile_by_id(cordelia.id)
+        flush_per_request_caches()
+        get_user_profile_by_id(hamlet.id)
+
+        # Changes from other processes are seen after the request
+        # ends, and only drop the keys that were changed.
+        cache_backend = get_cache_backend(None)
+        generation_key = cache.KEY_PREFIX + IN_PROCESS_CACHE_GENERATION_KEY
+        generation = cache_backend.incr(generation_key)
+        cache_backend.set(
+            in_process_cache_invalidated_keys_key(generation),
+            [user_profile_by_id_cache_key(hamlet.id)],
+        )
+        with self.assert_memcached_count(0):
+            get_user_profile_by_id(hamlet.id)
+        flush_per_request_caches()
+        with self.assert_memcached_count(1):
+            get_user_profile_by_id(hamlet.id)
+        with self.assert_memcached_count(0):
+            get_user_profile_by_id(cordelia.id)
+
+        # If the list of changed keys is missing, everything is dropped.
+        cache_backend.incr(generation_key)
+        flush_per_request_caches()
+        with self.assert_memcached_count(1):
+            get_user_profile_by_id(cordelia.id)
+
+        # The least recently used value is evicted.
+        get_user_profile_by_id(hamlet.id)
+        get_user_profile_by_id(othello.id)
+        with self.assert_memcached_count(1):
+            get_user_profile_by_id(cordelia.id)
+        with self.assert_memcached_count(0):
+            get_user_profile_by_id(othello.id)
+
+    def test_in_process_cache_disabled(self) -> None:
+        hamlet = self.example_user("hamlet")
+        get_user_profile_by_id(hamlet.id)
+        with self.assert_memcached_count(1):
+            get_user_profile_by_id(hamlet.id)
+
+
 class GenericBulkCachedFetchTest(ZulipTestCase):
     def test_query_function_called_only_if_needed(self) -> None:
         hamlet = self.example_user("hamlet")
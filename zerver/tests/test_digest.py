@@ -262,6 +262,17 @@ class TestDigestEmailMessages(ZulipTestCase):
             self.assertIn("some content", teaser_messages[0]["content"][0]["plain"])
             self.assertIn(teaser_messages[0]["sender"], expected_participants)
 
+        # These users all have the same default_language and emojiset,
+        # so the teasers are only rendered once and shared between them.
+        first_hot_conversations = mock_send_future_email.call_args_list[0][1]["context"][
+            "hot_conversations"
+        ]
+        for call_args in mock_send_future_email.call_args_list[1:]:
+            for teaser, first_teaser in zip(
+                call_args[1]["context"]["hot_conversations"], first_hot_conversations, strict=True
+            ):
+                self.assertIs(teaser, first_teaser)
+
         last_message_id = get_last_message_id()
         for digest_user in digest_users:
             log_rows = RealmAuditLog.objects.filter(
@@ -1,3 +1,6 @@
+import copy
+import os
+import tempfile
 import time
 from collections.abc import Callable, Collection
 from typing import Any
@@ -22,6 +25,10 @@ from zerver.tornado.event_queue import (
     ClientDescriptor,
     access_client_descriptor,
     allocate_client_descriptor,
+    clear_client_event_queues_for_testing,
+    dump_event_queues,
+    get_client_descriptors_for_user,
+    load_event_queues,
     maybe_enqueue_notifications,
     missedmessage_hook,
     persistent_queue_filename,
@@ -1204,6 +1211,56 @@ class FileReloadLogicTest(ZulipTestCase):
                 "/home/zulip/tornado/event_queues.9800.last.json",
             )
 
+    def test_dump_and_load_event_queues(self) -> None:
+        hamlet = self.example_user("hamlet")
+        queue_data = dict(
+            all_public_streams=False,
+            apply_markdown=True,
+            client_gravatar=True,
+            client_type_name="website",
+            event_types=None,
+            last_connection_time=time.time(),
+            queue_timeout=600,
+            realm_id=hamlet.realm_id,
+            user_profile_id=hamlet.id,
+        )
+        client = allocate_client_descriptor(queue_data)
+        client.event_queue.push({"type": "test_event"})
+        queue_id = client.event_queue.id
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pattern = os.path.join(tmpdir, "event_queues%s.json")
+            with self.settings(JSON_PERSISTENT_QUEUE_FILENAME_PATTERN=pattern):
+                with self.assertLogs(level="INFO") as logs:
+                    dump_event_queues(9800)
+                self.assertIn("Tornado 9800 dumped 1 event queues", logs.output[0])
+
+                # One queue per line, with a corrupt line that must
+                # not prevent loading the others.
+                with open(persistent_queue_filename(9800), "ab") as stored_queues:
+                    stored_queues.write(b"{not json\n")
+
+                clear_client_event_queues_for_testing()
+                with self.assertLogs(level="INFO") as logs:
+                    load_event_queues(9800)
+                self.assertIn("could not deserialize an event queue", logs.output[0])
+                self.assertIn("Tornado 9800 loaded 1 event queues", logs.output[-1])
+
+                loaded = access_client_descriptor(hamlet.id, queue_id)
+                self.assertEqual(loaded.to_dict(), client.to_dict())
+                self.assertEqual(get_client_descriptors_for_user(hamlet.id), [loaded])
+
+                # The legacy format was a single JSON array of
+                # (queue_id, client_dict) pairs.
+                with open(persistent_queue_filename(9800), "wb") as stored_queues:
+                    stored_queues.write(orjson.dumps([(queue_id, client.to_dict())]))
+
+                clear_client_event_queues_for_testing()
+                with self.assertLogs(level="INFO"):
+                    load_event_queues(9800)
+                loaded = access_client_descriptor(hamlet.id, queue_id)
+                self.assertEqual(loaded.to_dict(), client.to_dict())
+
 
 class PruneInternalDataTest(ZulipTestCase):
     def test_prune_internal_data(self) -> None:
@@ -1241,6 +1298,45 @@ class PruneInternalDataTest(ZulipTestCase):
         self.assertTrue("internal_data" in events[1])
         self.assertTrue("internal_data" in events[2])
 
+    def test_prune_internal_data_leaves_queue_unchanged(self) -> None:
+        user_profile = self.example_user("hamlet")
+        queue_data = dict(
+            all_public_streams=False,
+            apply_markdown=True,
+            client_gravatar=True,
+            client_type_name="website",
+            event_types=["message", "update_message_flags"],
+            last_connection_time=time.time(),
+            queue_timeout=600,
+            realm_id=user_profile.realm.id,
+            user_profile_id=user_profile.id,
+        )
+        client = allocate_client_descriptor(queue_data)
+
+        message_id = self.send_personal_message(self.example_user("iago"), user_profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.api_post(
+                user_profile,
+                "/api/v1/messages/flags",
+                {"messages": orjson.dumps([message_id]).decode(), "op": "add", "flag": "read"},
+            )
+        self.assert_json_success(result)
+        queued_events = copy.deepcopy(client.event_queue.contents(include_internal_data=True))
+        self.assertEqual(
+            [event["type"] for event in queued_events], ["message", "update_message_flags"]
+        )
+
+        # Build a response the way get_events does, and then change
+        # the returned events; the queued events must not see either.
+        response_events = client.event_queue.contents()
+        orjson.dumps(dict(result="success", msg="", events=response_events))
+        self.assertNotIn("internal_data", response_events[0])
+        for event in response_events:
+            event["id"] = -1
+            event["extra"] = True
+
+        self.assertEqual(client.event_queue.contents(include_internal_data=True), queued_events)
+
 
 class EventQueueTest(ZulipTestCase):
     def get_client_descriptor(self) -> ClientDescriptor:
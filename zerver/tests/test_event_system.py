@@ -12,7 +12,12 @@ from django.utils.timezone import now as timezone_now
 from typing_extensions import override
 
 from zerver.actions.custom_profile_fields import try_update_realm_custom_profile_field
-from zerver.actions.message_send import check_send_message
+from zerver.actions.message_send import (
+    check_send_message,
+    do_send_messages,
+    internal_prep_private_message,
+    internal_prep_stream_message,
+)
 from zerver.actions.presence import do_update_user_presence
 from zerver.actions.user_settings import do_change_user_setting
 from zerver.actions.users import do_change_user_role
@@ -33,15 +38,20 @@ from zerver.models.clients import get_client
 from zerver.models.realms import get_realm, get_realm_with_settings
 from zerver.models.streams import get_stream
 from zerver.models.users import get_system_bot
+from zerver.tornado.django_api import send_events
 from zerver.tornado.event_queue import (
+    ClientDescriptor,
     allocate_client_descriptor,
     clear_client_event_queues_for_testing,
     get_client_info_for_message_event,
+    get_message_client_descriptors_for_user,
     mark_clients_to_reload,
     process_message_event,
+    receiver_is_off_zulip,
     send_web_reload_client_events,
 )
 from zerver.tornado.exceptions import BadEventQueueIdError
+from zerver.tornado.sharding import get_user_id_tornado_port
 from zerver.tornado.views import get_events
 from zerver.views.events_register import _default_all_public_streams, _default_narrow
 
@@ -937,6 +947,85 @@ class ClientDescriptorsTest(ZulipTestCase):
         test_get_info(apply_markdown=False, client_gravatar=True)
         test_get_info(apply_markdown=True, client_gravatar=True)
 
+    def test_get_client_info_skips_clients_without_message_events(self) -> None:
+        hamlet = self.example_user("hamlet")
+        realm = hamlet.realm
+
+        def allocate(event_types: list[str] | None, all_public_streams: bool) -> ClientDescriptor:
+            queue_data = dict(
+                all_public_streams=all_public_streams,
+                apply_markdown=True,
+                client_gravatar=True,
+                client_type_name="website",
+                event_types=event_types,
+                last_connection_time=time.time(),
+                queue_timeout=0,
+                realm_id=realm.id,
+                user_profile_id=hamlet.id,
+            )
+            return allocate_client_descriptor(queue_data)
+
+        message_client = allocate(["message"], all_public_streams=False)
+        all_events_client = allocate(None, all_public_streams=False)
+        allocate(["presence"], all_public_streams=False)
+        allocate(["presence"], all_public_streams=True)
+
+        self.assertEqual(
+            get_message_client_descriptors_for_user(hamlet.id), [message_client, all_events_client]
+        )
+        self.assertFalse(receiver_is_off_zulip(hamlet.id))
+
+        client_info = get_client_info_for_message_event(
+            dict(realm_id=realm.id, stream_name="whatever"),
+            users=[dict(id=hamlet.id)],
+        )
+        self.assertEqual(
+            set(client_info), {message_client.event_queue.id, all_events_client.event_queue.id}
+        )
+
+        message_client.cleanup()
+        all_events_client.cleanup()
+        self.assertEqual(get_message_client_descriptors_for_user(hamlet.id), [])
+        self.assertTrue(receiver_is_off_zulip(hamlet.id))
+
+    def test_get_client_info_for_channel_narrows(self) -> None:
+        hamlet = self.example_user("hamlet")
+        realm = hamlet.realm
+
+        def allocate(narrow: list[list[str]]) -> ClientDescriptor:
+            queue_data = dict(
+                all_public_streams=False,
+                apply_markdown=True,
+                client_gravatar=True,
+                client_type_name="website",
+                event_types=["message"],
+                last_connection_time=time.time(),
+                queue_timeout=0,
+                realm_id=realm.id,
+                user_profile_id=hamlet.id,
+                narrow=narrow,
+            )
+            return allocate_client_descriptor(queue_data)
+
+        denmark_client = allocate([["stream", "denmark"], ["topic", "lunch"]])
+        verona_client = allocate([["channel", "Verona"]])
+        mentioned_client = allocate([["is", "mentioned"]])
+
+        client_info = get_client_info_for_message_event(
+            dict(realm_id=realm.id, stream_name="Denmark"),
+            users=[],
+        )
+        self.assertEqual(
+            set(client_info), {denmark_client.event_queue.id, mentioned_client.event_queue.id}
+        )
+
+        verona_client.cleanup()
+        client_info = get_client_info_for_message_event(
+            dict(realm_id=realm.id, stream_name="Verona"),
+            users=[],
+        )
+        self.assertEqual(set(client_info), {mentioned_client.event_queue.id})
+
     def test_process_message_event_with_mocked_client_info(self) -> None:
         hamlet = self.example_user("hamlet")
 
@@ -1164,6 +1253,113 @@ class ReloadWebClientsTest(ZulipTestCase):
         )
 
 
+class SendEventsTest(ZulipTestCase):
+    def test_send_events_batches_per_shard(self) -> None:
+        hamlet = self.example_user("hamlet")
+        cordelia = self.example_user("cordelia")
+        realm = hamlet.realm
+        ports = [9800, 9801]
+        event_a = dict(type="test_a")
+        event_b = dict(type="test_b")
+
+        with (
+            self.settings(TORNADO_PROCESSES=2),
+            mock.patch("zerver.tornado.django_api.get_realm_tornado_ports", return_value=ports),
+            mock.patch("zerver.tornado.django_api.queue_json_publish") as m,
+        ):
+            send_events(realm, [(event_a, [hamlet.id, cordelia.id]), (event_b, [hamlet.id])])
+
+        expected: dict[str, list[dict[str, Any]]] = {}
+        for event, user_id in [(event_a, hamlet.id), (event_a, cordelia.id), (event_b, hamlet.id)]:
+            queue_name = f"notify_tornado_port_{get_user_id_tornado_port(ports, user_id)}"
+            notices = expected.setdefault(queue_name, [])
+            if notices and notices[-1]["event"] is event:
+                notices[-1]["users"].append(user_id)
+            else:
+                notices.append(dict(event=event, users=[user_id]))
+
+        published = {call.args[0]: call.args[1] for call in m.call_args_list}
+        self.assert_length(m.call_args_list, len(expected))
+        for queue_name, notices in expected.items():
+            if len(notices) == 1:
+                self.assertEqual(published[queue_name], notices[0])
+            else:
+                self.assertEqual(published[queue_name], dict(notices=notices))
+
+    def test_send_events_processes_individual_notices(self) -> None:
+        hamlet = self.example_user("hamlet")
+        event_a = dict(type="test_a")
+        event_b = dict(type="test_b")
+
+        with self.capture_send_event_calls(expected_num_events=2) as events:
+            send_events(hamlet.realm, [(event_a, [hamlet.id]), (event_b, [hamlet.id])])
+        self.assertEqual(events[0], dict(event=event_a, users=[hamlet.id]))
+        self.assertEqual(events[1], dict(event=event_b, users=[hamlet.id]))
+
+    def test_do_send_messages_batches_events(self) -> None:
+        hamlet = self.example_user("hamlet")
+        cordelia = self.example_user("cordelia")
+
+        with (
+            mock.patch("zerver.tornado.django_api.queue_json_publish") as m,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            do_send_messages(
+                [
+                    internal_prep_private_message(
+                        sender=hamlet, recipient_user=cordelia, content=f"message {i}"
+                    )
+                    for i in range(3)
+                ]
+            )
+
+        message_notices = [
+            call.args[1]
+            for call in m.call_args_list
+            if "notices" in call.args[1]
+            and all(notice["event"]["type"] == "message" for notice in call.args[1]["notices"])
+        ]
+        self.assert_length(message_notices, 1)
+        self.assert_length(message_notices[0]["notices"], 3)
+
+    def test_do_send_messages_preserves_event_order(self) -> None:
+        hamlet = self.example_user("hamlet")
+        stream = get_stream("Denmark", hamlet.realm)
+        do_change_user_setting(
+            hamlet,
+            "automatically_follow_topics_policy",
+            UserProfile.AUTOMATICALLY_CHANGE_VISIBILITY_POLICY_ON_INITIATION,
+            acting_user=None,
+        )
+
+        # Each message starts a new topic, which hamlet then follows;
+        # the events for following the second topic must not be sent
+        # before the first message's event.
+        with self.capture_send_event_calls(expected_num_events=6) as events:
+            do_send_messages(
+                [
+                    internal_prep_stream_message(
+                        sender=hamlet, stream=stream, topic_name=f"topic {i}", content="hello"
+                    )
+                    for i in range(2)
+                ]
+            )
+
+        self.assertEqual(
+            [(event["event"]["type"], event["event"].get("topic_name")) for event in events],
+            [
+                ("muted_topics", None),
+                ("user_topic", "topic 0"),
+                ("message", None),
+                ("muted_topics", None),
+                ("user_topic", "topic 1"),
+                ("message", None),
+            ],
+        )
+        self.assertEqual(events[2]["event"]["message_dict"]["subject"], "topic 0")
+        self.assertEqual(events[5]["event"]["message_dict"]["subject"], "topic 1")
+
+
 class FetchQueriesTest(ZulipTestCase):
     def test_queries(self) -> None:
         user = self.example_user("hamlet")
@@ -41,8 +41,20 @@ from zerver.lib import upload
 from zerver.lib.avatar_hash import user_avatar_path
 from zerver.lib.bot_config import set_bot_config
 from zerver.lib.bot_lib import StateHandler
-from zerver.lib.export import Record, do_export_realm, do_export_user, export_usermessages_batch
-from zerver.lib.import_realm import do_import_realm, get_incoming_message_ids
+from zerver.lib.export import (
+    Record,
+    TableData,
+    do_export_realm,
+    do_export_user,
+    export_usermessages_batch,
+    fetch_reaction_data,
+)
+from zerver.lib.import_realm import (
+    do_import_realm,
+    fix_message_rendered_content,
+    get_incoming_message_ids,
+)
+from zerver.lib.markdown import version as markdown_version
 from zerver.lib.streams import create_stream_if_needed
 from zerver.lib.test_classes import ZulipTestCase
 from zerver.lib.test_helpers import (
@@ -51,6 +63,7 @@ from zerver.lib.test_helpers import (
     get_test_image_file,
     most_recent_message,
     most_recent_usermessage,
+    queries_captured,
     read_test_image_file,
     use_s3_backend,
 )
@@ -533,6 +546,33 @@ class RealmImportExportTest(ExportFile):
         self.assertIn(pm_b_msg_id, exported_message_ids)
         self.assertIn(pm_c_msg_id, exported_message_ids)
 
+    def test_fetch_reaction_data_in_chunks(self) -> None:
+        hamlet = self.example_user("hamlet")
+        iago = self.example_user("iago")
+        message_ids = [self.send_stream_message(hamlet, "Verona") for i in range(5)]
+        for message_id in message_ids[:2] + message_ids[3:]:
+            message = Message.objects.get(id=message_id)
+            do_add_reaction(hamlet, message, "outbox", "1f4e4", Reaction.UNICODE_EMOJI)
+            do_add_reaction(iago, message, "outbox", "1f4e4", Reaction.UNICODE_EMOJI)
+
+        # With chunks of two messages, the reactions are fetched in
+        # three queries, one of which finds reactions to only one of
+        # its messages.
+        response: TableData = {}
+        with (
+            patch("zerver.lib.export.MESSAGE_BATCH_CHUNK_SIZE", 2),
+            self.assert_database_query_count(3),
+        ):
+            fetch_reaction_data(response=response, message_ids=set(message_ids))
+
+        expected_reaction_ids = list(
+            Reaction.objects.filter(message_id__in=message_ids)
+            .order_by("message_id", "id")
+            .values_list("id", flat=True)
+        )
+        self.assert_length(expected_reaction_ids, 8)
+        self.assertEqual([row["id"] for row in response["zerver_reaction"]], expected_reaction_ids)
+
     def test_export_realm_with_exportable_user_ids(self) -> None:
         realm = Realm.objects.get(string_id="zulip")
 
@@ -1578,6 +1618,83 @@ class RealmImportExportTest(ExportFile):
         with self.assertRaises(ValidationError), self.assertLogs(level="INFO"):
             do_import_realm(output_dir, "test-zulip2")
 
+    def test_import_realm_with_duplicate_user_messages(self) -> None:
+        original_realm = Realm.objects.get(string_id="zulip")
+        hamlet = self.example_user("hamlet")
+        message_id = self.send_personal_message(
+            self.example_user("othello"), hamlet, content="duplicated user message"
+        )
+        user_message = UserMessage.objects.get(user_profile=hamlet, message_id=message_id)
+
+        self.export_realm_and_create_auditlog(original_realm)
+
+        # Third-party converters can generate duplicate UserMessage
+        # rows; only the first row for each user and message is kept.
+        data = read_json("messages-000001.json")
+        (record,) = (
+            row
+            for row in data["zerver_usermessage"]
+            if row["user_profile"] == hamlet.id and row["message"] == message_id
+        )
+        self.assertEqual(record["flags_mask"], int(user_message.flags))
+        duplicate_record = dict(record, flags_mask=UserMessage.flags.starred.mask)
+        data["zerver_usermessage"].append(duplicate_record)
+        with open(export_fn("messages-000001.json"), "wb") as f:
+            f.write(orjson.dumps(data))
+
+        # Lower the threshold so that the rows are loaded with COPY,
+        # which, unlike INSERT ... ON CONFLICT, does not skip duplicates.
+        with (
+            self.settings(BILLING_ENABLED=False),
+            self.assertLogs(level="INFO"),
+            patch("zerver.lib.user_message.BULK_COPY_UMS_THRESHOLD", 1),
+        ):
+            imported_realm = do_import_realm(get_output_dir(), "test-zulip")
+
+        imported_hamlet = get_user_by_delivery_email(hamlet.delivery_email, imported_realm)
+        imported_message = Message.objects.get(
+            realm=imported_realm, content="duplicated user message"
+        )
+        (imported_user_message,) = UserMessage.objects.filter(
+            user_profile=imported_hamlet, message=imported_message
+        )
+        self.assertEqual(int(imported_user_message.flags), int(user_message.flags))
+        self.assertEqual(
+            UserMessage.objects.filter(message=imported_message).count(),
+            UserMessage.objects.filter(message_id=message_id).count(),
+        )
+
+    def test_fix_message_rendered_content_shares_mention_lookups(self) -> None:
+        realm = get_realm("zulip")
+        othello = self.example_user("othello")
+        hamlet = self.example_user("hamlet")
+        verona = get_stream("Verona", realm)
+        content = f"@**King Hamlet|{hamlet.id}** see #**Verona**"
+        sender_map: dict[int, Record] = {
+            othello.id: {"id": othello.id, "is_bot": False, "translate_emoticons": False}
+        }
+
+        def render_messages(count: int) -> tuple[list[Record], int]:
+            messages: list[Record] = [
+                {"id": i, "sender_id": othello.id, "content": content, "rendered_content": None}
+                for i in range(count)
+            ]
+            with queries_captured() as queries:
+                fix_message_rendered_content(realm, sender_map, messages)
+            return messages, len(queries)
+
+        # The batch shares one MentionBackend, so the mentioned user
+        # and channel are only looked up for the first message.
+        (message,), single_message_queries = render_messages(1)
+        messages, batch_queries = render_messages(3)
+        self.assertEqual(batch_queries, single_message_queries)
+
+        self.assertIn(f'data-user-id="{hamlet.id}"', message["rendered_content"])
+        self.assertIn(f'data-stream-id="{verona.id}"', message["rendered_content"])
+        for batch_message in messages:
+            self.assertEqual(batch_message["rendered_content"], message["rendered_content"])
+            self.assertEqual(batch_message["rendered_content_version"], markdown_version)
+
     def test_import_realm_with_no_realm_user_default_table(self) -> None:
         original_realm = Realm.objects.get(string_id="zulip")
 
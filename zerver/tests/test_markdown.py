@@ -36,10 +36,13 @@ from zerver.lib.markdown import (
     clear_web_link_regex_for_testing,
     content_has_emoji_syntax,
     fetch_tweet_data,
+    get_markdown_engines_created,
     get_tweet_id,
     image_preview_enabled,
+    linkifier_data,
     markdown_convert,
     maybe_update_markdown_engines,
+    md_engines,
     possible_linked_stream_names,
     render_message_markdown,
     topic_links,
@@ -2111,6 +2114,46 @@ class MarkdownCodeBlockTest(ZulipTestCase):
         )
         self.assertEqual(rendering_result.rendered_content, expected_output)
 
+    def test_markdown_engine_cache(self) -> None:
+        zulip_realm = get_realm("zulip")
+        lear_realm = get_realm("lear")
+
+        md_engines.clear()
+        linkifier_data.clear()
+        with mock.patch("zerver.lib.markdown.MAX_MD_ENGINES", 1):
+            markdown_convert("hello", message_realm=zulip_realm)
+            self.assertEqual(list(md_engines), [(zulip_realm.id, False)])
+            self.assertEqual(list(linkifier_data), [zulip_realm.id])
+            created = get_markdown_engines_created()
+
+            # Rendering again reuses the cached engine.
+            markdown_convert("hello", message_realm=zulip_realm)
+            self.assertEqual(get_markdown_engines_created(), created)
+
+            # The least recently used engine is evicted to make room,
+            # along with its linkifiers.
+            markdown_convert("hello", message_realm=lear_realm)
+            self.assertEqual(list(md_engines), [(lear_realm.id, False)])
+            self.assertEqual(list(linkifier_data), [lear_realm.id])
+            self.assertEqual(get_markdown_engines_created(), created + 1)
+
+            markdown_convert("hello", message_realm=zulip_realm)
+            self.assertEqual(get_markdown_engines_created(), created + 2)
+
+        # The linkifiers are kept while either of a realm's engines is.
+        with mock.patch("zerver.lib.markdown.MAX_MD_ENGINES", 2):
+            markdown_convert("hello", message_realm=zulip_realm, email_gateway=True)
+            self.assertEqual(list(md_engines), [(zulip_realm.id, False), (zulip_realm.id, True)])
+            markdown_convert("hello", message_realm=lear_realm)
+            self.assertEqual(list(md_engines), [(zulip_realm.id, True), (lear_realm.id, False)])
+            self.assertEqual(list(linkifier_data), [zulip_realm.id, lear_realm.id])
+
+            # Evicting an engine whose linkifiers are already gone is fine.
+            del linkifier_data[zulip_realm.id]
+            markdown_convert("hello", message_realm=lear_realm, email_gateway=True)
+            self.assertEqual(list(md_engines), [(lear_realm.id, False), (lear_realm.id, True)])
+            self.assertEqual(list(linkifier_data), [lear_realm.id])
+
 
 class MarkdownMentionTest(ZulipTestCase):
     def test_mention_topic_wildcard(self) -> None:
@@ -431,6 +431,32 @@ class MessageHydrationTest(ZulipTestCase):
         self.assertIn('class="user-mention"', new_message["content"])
         self.assertEqual(new_message["flags"], ["mentioned"])
 
+    def test_messages_for_ids_avatar_computed_once_per_sender(self) -> None:
+        cordelia = self.example_user("cordelia")
+        hamlet = self.example_user("hamlet")
+        message_ids = [
+            self.send_stream_message(cordelia, "Verona", content="foo"),
+            self.send_stream_message(cordelia, "Verona", content="bar"),
+            self.send_stream_message(hamlet, "Verona", content="baz"),
+        ]
+
+        with mock.patch(
+            "zerver.lib.message_cache.get_avatar_field", return_value="/avatar.png"
+        ) as avatar_mock:
+            messages = messages_for_ids(
+                message_ids=message_ids,
+                user_message_flags={message_id: [] for message_id in message_ids},
+                search_fields={},
+                apply_markdown=True,
+                client_gravatar=False,
+                allow_edit_history=False,
+                user_profile=cordelia,
+                realm=cordelia.realm,
+            )
+
+        self.assertEqual(avatar_mock.call_count, 2)
+        self.assertEqual([message["avatar_url"] for message in messages], ["/avatar.png"] * 3)
+
     def test_message_for_ids_for_restricted_user_access(self) -> None:
         self.set_up_db_for_testing_user_access()
         hamlet = self.example_user("hamlet")
@@ -43,7 +43,7 @@ from zerver.lib.narrow import (
     post_process_limited_query,
 )
 from zerver.lib.narrow_helpers import NarrowTerm
-from zerver.lib.narrow_predicate import build_narrow_predicate
+from zerver.lib.narrow_predicate import build_narrow_predicate, get_narrow_channel_name
 from zerver.lib.sqlalchemy_utils import get_sqlalchemy_connection
 from zerver.lib.streams import StreamDict, create_streams_if_needed, get_public_streams_queryset
 from zerver.lib.test_classes import ZulipTestCase
@@ -513,7 +513,7 @@ class NarrowBuilderTest(ZulipTestCase):
         term = NarrowParameter(operator="search", operand='"french fries"')
         self._do_add_term_test(
             term,
-            "WHERE (content ILIKE %(content_1)s OR subject ILIKE %(subject_1)s) AND (search_tsvector @@ plainto_tsquery(%(param_4)s, %(param_5)s))",
+            "WHERE search_tsvector @@ (plainto_tsquery(%(param_4)s, %(param_5)s) && phraseto_tsquery(%(param_6)s, %(param_7)s))",
         )
 
     @override_settings(USING_PGROONGA=False)
@@ -521,7 +521,7 @@ class NarrowBuilderTest(ZulipTestCase):
         term = NarrowParameter(operator="search", operand='"french fries"', negated=True)
         self._do_add_term_test(
             term,
-            "WHERE NOT (content ILIKE %(content_1)s OR subject ILIKE %(subject_1)s) AND NOT (search_tsvector @@ plainto_tsquery(%(param_4)s, %(param_5)s))",
+            "WHERE NOT (search_tsvector @@ (plainto_tsquery(%(param_4)s, %(param_5)s) && phraseto_tsquery(%(param_6)s, %(param_7)s)))",
         )
 
     @override_settings(USING_PGROONGA=True)
@@ -975,6 +975,74 @@ class NarrowLibraryTest(ZulipTestCase):
             )
         )
 
+    def test_build_narrow_predicate_negated(self) -> None:
+        narrow_predicate = build_narrow_predicate(
+            [NarrowTerm(operator="channel", operand="Devel", negated=True)]
+        )
+
+        self.assertFalse(
+            narrow_predicate(
+                message={"display_recipient": "devel", "type": "stream"},
+                flags=[],
+            )
+        )
+        self.assertTrue(
+            narrow_predicate(
+                message={"display_recipient": "social", "type": "stream"},
+                flags=[],
+            )
+        )
+        self.assertTrue(
+            narrow_predicate(
+                message={"type": "private"},
+                flags=[],
+            )
+        )
+
+        ###
+
+        narrow_predicate = build_narrow_predicate(
+            [
+                NarrowTerm(operator="channel", operand="devel"),
+                NarrowTerm(operator="is", operand="resolved", negated=True),
+            ]
+        )
+
+        self.assertTrue(
+            narrow_predicate(
+                message={"display_recipient": "devel", "type": "stream", "subject": "python"},
+                flags=[],
+            )
+        )
+        self.assertFalse(
+            narrow_predicate(
+                message={"display_recipient": "devel", "type": "stream", "subject": "✔ python"},
+                flags=[],
+            )
+        )
+        self.assertFalse(
+            narrow_predicate(
+                message={"display_recipient": "social", "type": "stream", "subject": "python"},
+                flags=[],
+            )
+        )
+
+    def test_get_narrow_channel_name(self) -> None:
+        self.assertIsNone(get_narrow_channel_name([]))
+        self.assertIsNone(get_narrow_channel_name([NarrowTerm(operator="is", operand="dm")]))
+        self.assertIsNone(
+            get_narrow_channel_name([NarrowTerm(operator="channel", operand="devel", negated=True)])
+        )
+        self.assertEqual(
+            get_narrow_channel_name(
+                [
+                    NarrowTerm(operator="topic", operand="bark"),
+                    NarrowTerm(operator="stream", operand="Devel"),
+                ]
+            ),
+            "devel",
+        )
+
     def test_build_narrow_predicate_invalid(self) -> None:
         with self.assertRaises(JsonableError):
             build_narrow_predicate([NarrowTerm(operator="invalid_operator", operand="operand")])
@@ -3113,6 +3181,56 @@ class GetOldMessagesTest(ZulipTestCase):
             '<p>Public <span class="highlight">special</span> content!</p>',
         )
 
+    @override_settings(USING_PGROONGA=False)
+    def test_get_messages_with_phrase_search(self) -> None:
+        self.login("cordelia")
+        cordelia = self.example_user("cordelia")
+
+        in_order_id = self.send_stream_message(
+            cordelia, "Verona", topic_name="phrase search", content="The weekly meeting is off"
+        )
+        out_of_order_id = self.send_stream_message(
+            cordelia, "Verona", topic_name="phrase search", content="A meeting, weekly or not"
+        )
+        punctuated_id = self.send_stream_message(
+            cordelia, "Verona", topic_name="phrase search", content="Reminder: weekly. Meetings!"
+        )
+        unrelated_id = self.send_stream_message(
+            cordelia, "Verona", topic_name="phrase search", content="Nothing to see here"
+        )
+        self._update_tsvector_index()
+
+        def get_search_result_ids(operand: str, negated: bool = False) -> list[int]:
+            narrow = [
+                dict(operator="topic", operand="phrase search"),
+                dict(operator="search", operand=operand, negated=negated),
+            ]
+            result = self.get_and_check_messages(
+                dict(
+                    narrow=orjson.dumps(narrow).decode(),
+                    anchor=in_order_id,
+                    num_before=0,
+                    num_after=10,
+                )
+            )
+            return [message["id"] for message in result["messages"]]
+
+        # Without quotes, the words can appear in any order.
+        self.assertEqual(
+            get_search_result_ids("meeting weekly"), [in_order_id, out_of_order_id, punctuated_id]
+        )
+
+        # A quoted phrase matches only words in that order, ignoring
+        # punctuation between them and stemming them.
+        self.assertEqual(get_search_result_ids('"weekly meeting"'), [in_order_id, punctuated_id])
+
+        # A negated phrase excludes only the messages containing the
+        # phrase, not every message containing its words.
+        self.assertEqual(
+            get_search_result_ids('"weekly meeting"', negated=True),
+            [out_of_order_id, unrelated_id],
+        )
+
     @override_settings(USING_PGROONGA=True)
     def test_get_messages_with_search_pgroonga(self) -> None:
         self.login("cordelia")
@@ -4571,7 +4689,7 @@ recipient_id = %(recipient_id_3)s AND upper(subject) = upper(%(param_2)s))\
             sql,
         )
 
-        sql_template = "SELECT anon_1.message_id, anon_1.flags \nFROM (SELECT message_id, flags \nFROM zerver_usermessage JOIN zerver_message ON zerver_usermessage.message_id = zerver_message.id \nWHERE user_profile_id = {hamlet_id} AND recipient_id = {scotland_recipient} AND (flags & 2) != 0 ORDER BY message_id ASC \n LIMIT 10) AS anon_1 ORDER BY message_id ASC"
+        sql_template = "SELECT anon_1.message_id, anon_1.flags \nFROM (SELECT message_id, flags \nFROM zerver_usermessage JOIN zerver_message ON zerver_usermessage.message_id = zerver_message.id \nWHERE user_profile_id = {hamlet_id} AND realm_id = {realm_id} AND recipient_id = {scotland_recipient} AND (flags & 2) != 0 ORDER BY message_id ASC \n LIMIT 10) AS anon_1 ORDER BY message_id ASC"
         sql = sql_template.format(**query_ids)
         self.common_check_get_messages_query(
             {
@@ -4628,12 +4746,12 @@ WHERE realm_id = 2 AND recipient_id = {scotland_recipient} AND (search_tsvector
         sql_template = """\
 SELECT anon_1.message_id, anon_1.flags, anon_1.subject, anon_1.rendered_content, anon_1.content_matches, anon_1.topic_matches \n\
 FROM (SELECT message_id, flags, subject, rendered_content, array((SELECT ARRAY[sum(length(anon_3) - 11) OVER (ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) + 11, strpos(anon_3, '</ts-match>') - 1] AS anon_2 \n\
-FROM unnest(string_to_array(ts_headline('zulip.english_us_search', rendered_content, plainto_tsquery('zulip.english_us_search', '"jumping" quickly'), 'HighlightAll = TRUE, StartSel = <ts-match>, StopSel = </ts-match>'), '<ts-match>')) AS anon_3\n\
+FROM unnest(string_to_array(ts_headline('zulip.english_us_search', rendered_content, plainto_tsquery('zulip.english_us_search', '"jumping" quickly') && phraseto_tsquery('zulip.english_us_search', 'jumping'), 'HighlightAll = TRUE, StartSel = <ts-match>, StopSel = </ts-match>'), '<ts-match>')) AS anon_3\n\
  LIMIT ALL OFFSET 1)) AS content_matches, array((SELECT ARRAY[sum(length(anon_5) - 11) OVER (ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) + 11, strpos(anon_5, '</ts-match>') - 1] AS anon_4 \n\
-FROM unnest(string_to_array(ts_headline('zulip.english_us_search', escape_html(subject), plainto_tsquery('zulip.english_us_search', '"jumping" quickly'), 'HighlightAll = TRUE, StartSel = <ts-match>, StopSel = </ts-match>'), '<ts-match>')) AS anon_5\n\
+FROM unnest(string_to_array(ts_headline('zulip.english_us_search', escape_html(subject), plainto_tsquery('zulip.english_us_search', '"jumping" quickly') && phraseto_tsquery('zulip.english_us_search', 'jumping'), 'HighlightAll = TRUE, StartSel = <ts-match>, StopSel = </ts-match>'), '<ts-match>')) AS anon_5\n\
  LIMIT ALL OFFSET 1)) AS topic_matches \n\
 FROM zerver_usermessage JOIN zerver_message ON zerver_usermessage.message_id = zerver_message.id \n\
-WHERE user_profile_id = {hamlet_id} AND (content ILIKE '%jumping%' OR subject ILIKE '%jumping%') AND (search_tsvector @@ plainto_tsquery('zulip.english_us_search', '"jumping" quickly')) ORDER BY message_id ASC \n\
+WHERE user_profile_id = {hamlet_id} AND (search_tsvector @@ (plainto_tsquery('zulip.english_us_search', '"jumping" quickly') && phraseto_tsquery('zulip.english_us_search', 'jumping'))) ORDER BY message_id ASC \n\
  LIMIT 10) AS anon_1 ORDER BY message_id ASC\
 """
         sql = sql_template.format(**query_ids)
@@ -219,6 +219,18 @@ class UnreadCountTests(ZulipTestCase):
                 found += 1
         self.assertEqual(found, 2)
 
+        # Repeating the update changes nothing, and sends no event.
+        with self.capture_send_event_calls(expected_num_events=0):
+            result = self.client_post(
+                "/json/messages/flags",
+                {
+                    "messages": orjson.dumps(self.unread_msg_ids).decode(),
+                    "op": "add",
+                    "flag": "read",
+                },
+            )
+        self.assert_json_success(result)
+
         result = self.client_post(
             "/json/messages/flags",
             {
@@ -1019,6 +1031,64 @@ class GetUnreadMsgsTest(ZulipTestCase):
             ),
         )
 
+    def test_raw_unread_stream_same_topic_in_several_streams(self) -> None:
+        cordelia = self.example_user("cordelia")
+        hamlet = self.example_user("hamlet")
+
+        stream_names = [
+            "muted topic",
+            "unmuted",
+            "muted stream",
+            "unmuted topic in muted stream",
+        ]
+        message_ids = {}
+        wildcard_message_ids = {}
+        for stream_name in stream_names:
+            self.make_stream(stream_name)
+            self.subscribe(hamlet, stream_name)
+            self.subscribe(cordelia, stream_name)
+            message_ids[stream_name] = self.send_stream_message(
+                cordelia, stream_name, topic_name="lunch"
+            )
+            wildcard_message_ids[stream_name] = self.send_stream_message(
+                cordelia, stream_name, content="@**all** lunch time", topic_name="lunch"
+            )
+
+        self.set_topic_visibility_policy(
+            user_profile=hamlet,
+            stream_name="muted topic",
+            topic_name="lunch",
+            visibility_policy=UserTopic.VisibilityPolicy.MUTED,
+        )
+        for stream_name in ["muted stream", "unmuted topic in muted stream"]:
+            self.mute_stream(
+                user_profile=hamlet,
+                stream=get_stream(stream_name, hamlet.realm),
+            )
+        self.set_topic_visibility_policy(
+            user_profile=hamlet,
+            stream_name="unmuted topic in muted stream",
+            topic_name="lunch",
+            visibility_policy=UserTopic.VisibilityPolicy.UNMUTED,
+        )
+
+        raw_unread_data = get_raw_unread_data(
+            user_profile=hamlet,
+        )
+
+        # Whether the topic is muted is computed once per topic, and
+        # must not be shared between streams with the same topic name.
+        unmuted_stream_names = ["unmuted", "unmuted topic in muted stream"]
+        self.assertEqual(
+            raw_unread_data["unmuted_stream_msgs"],
+            {message_ids[stream_name] for stream_name in unmuted_stream_names}
+            | {wildcard_message_ids[stream_name] for stream_name in unmuted_stream_names},
+        )
+        self.assertEqual(
+            raw_unread_data["mentions"],
+            {wildcard_message_ids[stream_name] for stream_name in unmuted_stream_names},
+        )
+
     def test_raw_unread_direct_message_group(self) -> None:
         cordelia = self.example_user("cordelia")
         othello = self.example_user("othello")
@@ -16,9 +16,11 @@ from zerver.actions.message_edit import (
 from zerver.actions.reactions import do_add_reaction
 from zerver.actions.realm_settings import do_set_realm_property
 from zerver.actions.user_topics import do_set_user_topic_visibility_policy
+from zerver.lib.cache import cache_get, cache_set_many, to_dict_cache_key_id
 from zerver.lib.message import truncate_topic
+from zerver.lib.message_cache import extract_message_dict
 from zerver.lib.test_classes import ZulipTestCase, get_topic_messages
-from zerver.lib.topic import RESOLVED_TOPIC_PREFIX, messages_for_topic
+from zerver.lib.topic import RESOLVED_TOPIC_PREFIX, TOPIC_NAME, messages_for_topic
 from zerver.lib.user_topics import (
     get_users_with_user_topic_visibility_policy,
     set_topic_visibility_policy,
@@ -1109,6 +1111,45 @@ class MessageMoveTopicTest(ZulipTestCase):
         self.check_topic(id3, topic_name="topiC1")
         self.check_topic(id4, topic_name="edited")
 
+    @mock.patch("zerver.actions.message_edit.send_event_on_commit")
+    def test_move_topic_updates_message_cache_in_batches(
+        self, mock_send_event: mock.MagicMock
+    ) -> None:
+        self.login("hamlet")
+        hamlet = self.example_user("hamlet")
+        message_ids = [
+            self.send_stream_message(hamlet, "Denmark", topic_name="topic1") for i in range(3)
+        ]
+
+        with (
+            mock.patch("zerver.lib.message_cache.UPDATE_MESSAGE_CACHE_BATCH_SIZE", 1),
+            mock.patch(
+                "zerver.lib.message_cache.cache_set_many", wraps=cache_set_many
+            ) as mock_cache_set_many,
+        ):
+            result = self.client_patch(
+                f"/json/messages/{message_ids[0]}",
+                {
+                    "topic": "edited",
+                    "propagate_mode": "change_all",
+                    "send_notification_to_old_thread": "false",
+                    "send_notification_to_new_thread": "false",
+                },
+            )
+        self.assert_json_success(result)
+        self.assertEqual(mock_cache_set_many.call_count, 3)
+
+        (update_message_event,) = (
+            call.args[1]
+            for call in mock_send_event.call_args_list
+            if call.args[1]["type"] == "update_message"
+        )
+        self.assertEqual(sorted(update_message_event["message_ids"]), message_ids)
+        for message_id in message_ids:
+            self.check_topic(message_id, topic_name="edited")
+            cached_message = extract_message_dict(cache_get(to_dict_cache_key_id(message_id))[0])
+            self.assertEqual(cached_message[TOPIC_NAME], "edited")
+
     def test_change_all_propagate_mode_for_moving_from_stream_with_restricted_history(self) -> None:
         self.make_stream("privatestream", invite_only=True, history_public_to_subscribers=False)
         iago = self.example_user("iago")
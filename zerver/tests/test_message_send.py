@@ -40,7 +40,11 @@ from zerver.lib.exceptions import (
     DirectMessagePermissionError,
     JsonableError,
 )
-from zerver.lib.message import get_raw_unread_data, get_recent_private_conversations
+from zerver.lib.message import (
+    check_user_group_mention_allowed,
+    get_raw_unread_data,
+    get_recent_private_conversations,
+)
 from zerver.lib.message_cache import MessageDict
 from zerver.lib.per_request_cache import flush_per_request_caches
 from zerver.lib.streams import create_stream_if_needed
@@ -1601,7 +1605,7 @@ class StreamMessagesTest(ZulipTestCase):
             setting_value=UserProfile.AUTOMATICALLY_CHANGE_VISIBILITY_POLICY_NEVER,
             acting_user=None,
         )
-        with self.assert_database_query_count(13):
+        with self.assert_database_query_count(12):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1621,7 +1625,7 @@ class StreamMessagesTest(ZulipTestCase):
         # 5 queries: 1 to check if it is the first message in the topic +
         # 1 to check if the topic is already followed + 3 to follow the topic.
         flush_per_request_caches()
-        with self.assert_database_query_count(18):
+        with self.assert_database_query_count(17):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1641,7 +1645,7 @@ class StreamMessagesTest(ZulipTestCase):
         # a message to a topic with visibility policy other than FOLLOWED.
         # 1 to check if the topic is already followed + 3 queries to follow the topic.
         flush_per_request_caches()
-        with self.assert_database_query_count(17):
+        with self.assert_database_query_count(16):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1652,7 +1656,7 @@ class StreamMessagesTest(ZulipTestCase):
         # If the topic is already FOLLOWED, there will be an increase in the query
         # count of 1 to check if the topic is already followed.
         flush_per_request_caches()
-        with self.assert_database_query_count(14):
+        with self.assert_database_query_count(13):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1677,7 +1681,7 @@ class StreamMessagesTest(ZulipTestCase):
         # 1 to get the user_id of the mentioned user + 1 to check if the topic
         # is already followed + 3 queries to follow the topic.
         flush_per_request_caches()
-        with self.assert_database_query_count(22):
+        with self.assert_database_query_count(21):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1690,7 +1694,7 @@ class StreamMessagesTest(ZulipTestCase):
         # 1 to get the user_id of the mentioned user + 1 to check if the topic is
         # already followed.
         flush_per_request_caches()
-        with self.assert_database_query_count(19):
+        with self.assert_database_query_count(18):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1700,7 +1704,7 @@ class StreamMessagesTest(ZulipTestCase):
             )
 
         flush_per_request_caches()
-        with self.assert_database_query_count(16):
+        with self.assert_database_query_count(15):
             check_send_stream_message(
                 sender=sender,
                 client=sending_client,
@@ -1750,6 +1754,26 @@ class StreamMessagesTest(ZulipTestCase):
             user_profile=user_profile, message=message
         ).flags.mentioned.is_set
 
+    def test_user_messages_copied_in_bulk(self) -> None:
+        hamlet = self.example_user("hamlet")
+        iago = self.example_user("iago")
+        self.subscribe(iago, "Denmark")
+
+        def get_user_message_flags(message_id: int) -> dict[int, int]:
+            return {
+                um.user_profile_id: int(um.flags)
+                for um in UserMessage.objects.filter(message_id=message_id)
+            }
+
+        content = "test @**Iago** rules"
+        inserted_message_id = self.send_stream_message(hamlet, "Denmark", content=content)
+        with mock.patch("zerver.lib.user_message.BULK_COPY_UMS_THRESHOLD", 1):
+            copied_message_id = self.send_stream_message(hamlet, "Denmark", content=content)
+
+        copied_flags = get_user_message_flags(copied_message_id)
+        self.assertEqual(copied_flags, get_user_message_flags(inserted_message_id))
+        self.assertTrue(copied_flags[iago.id] & UserMessage.flags.mentioned)
+
     def test_is_private_flag(self) -> None:
         user_profile = self.example_user("iago")
         self.subscribe(user_profile, "Denmark")
@@ -2271,6 +2295,71 @@ class StreamMessagesTest(ZulipTestCase):
         result = self.api_get(cordelia, "/api/v1/messages/" + str(msg_id))
         self.assert_json_success(result)
 
+    def test_user_group_mention_restrictions_for_several_groups(self) -> None:
+        cordelia = self.example_user("cordelia")
+        othello = self.example_user("othello")
+        realm = cordelia.realm
+        self.subscribe(cordelia, "test_stream")
+
+        # Cordelia is a member of "outer" only through its subgroup.
+        inner = check_add_user_group(realm, "inner", [cordelia], acting_user=None)
+        outer = check_add_user_group(realm, "outer", [othello], acting_user=None)
+        add_subgroups_to_user_group(outer, [inner], acting_user=None)
+        direct = check_add_user_group(realm, "direct", [cordelia], acting_user=None)
+        moderators_system_group = NamedUserGroup.objects.get(
+            realm=realm, name=SystemGroups.MODERATORS, is_system_group=True
+        )
+
+        nested_allowed = check_add_user_group(
+            realm,
+            "nested_allowed",
+            [],
+            group_settings_map={"can_mention_group": outer},
+            acting_user=None,
+        )
+        direct_allowed = check_add_user_group(
+            realm,
+            "direct_allowed",
+            [],
+            group_settings_map={"can_mention_group": direct},
+            acting_user=None,
+        )
+        restricted = check_add_user_group(
+            realm,
+            "restricted",
+            [],
+            group_settings_map={"can_mention_group": moderators_system_group},
+            acting_user=None,
+        )
+
+        # The sender's group memberships are fetched once for all the
+        # mentioned groups, in addition to the query for the groups.
+        with self.assert_database_query_count(2):
+            check_user_group_mention_allowed(cordelia, [nested_allowed.id, direct_allowed.id])
+
+        with (
+            self.assert_database_query_count(2),
+            self.assertRaisesRegex(
+                JsonableError,
+                f"You are not allowed to mention user group '{restricted.name}'.",
+            ),
+        ):
+            check_user_group_mention_allowed(
+                cordelia, [nested_allowed.id, direct_allowed.id, restricted.id]
+            )
+
+        content = "Test mentioning user groups @*nested_allowed* @*direct_allowed* @*restricted*"
+        with self.assertRaisesRegex(
+            JsonableError,
+            f"You are not allowed to mention user group '{restricted.name}'.",
+        ):
+            self.send_stream_message(cordelia, "test_stream", content)
+
+        content = "Test mentioning user groups @*nested_allowed* @*direct_allowed*"
+        msg_id = self.send_stream_message(cordelia, "test_stream", content)
+        result = self.api_get(cordelia, "/api/v1/messages/" + str(msg_id))
+        self.assert_json_success(result)
+
     def test_stream_message_mirroring(self) -> None:
         user = self.mit_user("starnine")
         self.subscribe(user, "Verona")
@@ -9,6 +9,7 @@ from django.utils.timezone import now as timezone_now
 from typing_extensions import override
 
 from zerver.actions.users import do_deactivate_user
+from zerver.lib.cache import cache_delete, realm_presence_generation_cache_key
 from zerver.lib.presence import format_legacy_presence_dict, get_presence_dict_by_realm
 from zerver.lib.test_classes import ZulipTestCase
 from zerver.lib.test_helpers import make_client, reset_email_visibility_to_everyone_in_zulip_realm
@@ -150,7 +151,8 @@ class UserPresenceModelTests(ZulipTestCase):
         self.assertEqual(last_update_id, -1)
 
         self.login_user(user_profile)
-        result = self.client_post("/json/users/me/presence", {"status": "active"})
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", {"status": "active"})
         self.assert_json_success(result)
 
         actual_last_update_id = UserPresence.objects.all().latest("last_update_id").last_update_id
@@ -163,19 +165,45 @@ class UserPresenceModelTests(ZulipTestCase):
 
         # Now pass last_update_id as of this latest fetch. The server should only query for data
         # updated after that. There's no such data, so we get no presence data back and the
-        # returned last_update_id remains the same.
-        presence_dct, last_update_id = get_presence_dict_by_realm(
-            user_profile.realm,
-            slim_presence,
-            last_update_id_fetched_by_client=actual_last_update_id,
-        )
+        # returned last_update_id remains the same.  The server finds that out by looking up
+        # the realm's latest last_update_id, which it caches, rather than querying UserPresence.
+        with self.assert_database_query_count(1):
+            presence_dct, last_update_id = get_presence_dict_by_realm(
+                user_profile.realm,
+                slim_presence,
+                last_update_id_fetched_by_client=actual_last_update_id,
+            )
+        self.assert_length(presence_dct, 0)
+        self.assertEqual(last_update_id, actual_last_update_id)
+
+        # The next such fetch doesn't need to query the database at all.
+        with self.assert_database_query_count(0, keep_cache_warm=True):
+            presence_dct, last_update_id = get_presence_dict_by_realm(
+                user_profile.realm,
+                slim_presence,
+                last_update_id_fetched_by_client=actual_last_update_id,
+            )
+        self.assert_length(presence_dct, 0)
+        self.assertEqual(last_update_id, actual_last_update_id)
+
+        # If the realm's presence generation is evicted, the cached
+        # last_update_id is no longer trusted.
+        cache_delete(realm_presence_generation_cache_key(user_profile.realm_id))
+        with self.assert_database_query_count(1, keep_cache_warm=True):
+            presence_dct, last_update_id = get_presence_dict_by_realm(
+                user_profile.realm,
+                slim_presence,
+                last_update_id_fetched_by_client=actual_last_update_id,
+            )
         self.assert_length(presence_dct, 0)
         self.assertEqual(last_update_id, actual_last_update_id)
 
-        # Now generate a new update in the realm.
+        # Now generate a new update in the realm.  Committing it
+        # invalidates the cached last_update_id.
         iago = self.example_user("iago")
         self.login_user(iago)
-        result = self.client_post("/json/users/me/presence", {"status": "active"})
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", {"status": "active"})
 
         # There's a new update now, so we can expect it to be fetched; and no older data.
         presence_dct, last_update_id = get_presence_dict_by_realm(
@@ -256,8 +284,12 @@ class UserPresenceTests(ZulipTestCase):
 
         self.login_user(hamlet)
 
+        # Presence updates invalidate the realm's cached last_update_id
+        # once they commit, so we run the on_commit callbacks as a
+        # real request would.
         params = dict(status="idle", last_update_id=-1)
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
         self.assertEqual(set(json["presences"].keys()), {str(hamlet.id)})
 
@@ -271,13 +303,15 @@ class UserPresenceTests(ZulipTestCase):
         # Re-doing an idle status so soon doesn't cause updates
         # so this doesn't mutate any state.
         params = dict(status="idle", slim_presence="false")
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
         self.assertEqual(json["presence_last_update_id"], last_update_id)
 
         self.login_user(othello)
         params = dict(status="idle", last_update_id=-1)
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
         self.assertEqual(set(json["presences"].keys()), {str(hamlet.id), str(othello.id)})
         self.assertEqual(json["presence_last_update_id"], last_update_id + 1)
@@ -286,7 +320,8 @@ class UserPresenceTests(ZulipTestCase):
         # Immediately sending an idle status again doesn't cause updates, so the server
         # doesn't have any new data since last_update_id to return.
         params = dict(status="idle", last_update_id=last_update_id)
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
         self.assertEqual(set(json["presences"].keys()), set())
         # No new data, so the last_update_id is returned back.
@@ -296,7 +331,8 @@ class UserPresenceTests(ZulipTestCase):
         # want to verify he gets hamlet's update and nothing else.
         self.login_user(hamlet)
         params = dict(status="active", last_update_id=-1)
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
 
         # Make sure UserPresence.last_update_id is incremented.
@@ -307,7 +343,8 @@ class UserPresenceTests(ZulipTestCase):
         # Now othello checks presence and should get hamlet's update.
         self.login_user(othello)
         params = dict(status="idle", last_update_id=last_update_id)
-        result = self.client_post("/json/users/me/presence", params)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.client_post("/json/users/me/presence", params)
         json = self.assert_json_success(result)
         self.assertEqual(set(json["presences"].keys()), {str(hamlet.id)})
         self.assertEqual(json["presence_last_update_id"], last_update_id + 1)
@@ -15,6 +15,7 @@ from zerver.actions.scheduled_messages import check_schedule_message, delete_sch
 from zerver.actions.submessage import do_add_submessage
 from zerver.lib.retention import (
     archive_messages,
+    archive_messages_by_recipient,
     clean_archived_data,
     get_realms_and_streams_for_archiving,
     move_messages_to_archive,
@@ -223,6 +224,17 @@ class TestArchiveMessagesGeneral(ArchiveMessagesTestingBase):
         self.assertEqual(ArchivedUserMessage.objects.count(), 0)
         self.assertEqual(ArchivedMessage.objects.count(), 0)
 
+    def test_no_expired_stream_messages(self) -> None:
+        verona = get_stream("Verona", self.zulip_realm)
+        assert verona.recipient is not None
+        Message.objects.filter(recipient=verona.recipient).update(date_sent=timezone_now())
+
+        # Streams with nothing to archive are checked with a single
+        # query, without creating an ArchiveTransaction.
+        with self.assert_database_query_count(1):
+            message_count = archive_messages_by_recipient(verona.recipient, 1, self.zulip_realm)
+        self.assertEqual(message_count, 0)
+
     def test_expired_messages_in_each_realm(self) -> None:
         """General test for archiving expired messages properly with
         multiple realms involved"""
@@ -553,8 +553,11 @@ class SoftDeactivationMessageTest(ZulipTestCase):
 
         idle_user_msg_list = get_user_messages(long_term_idle_user)
         idle_user_msg_count = len(idle_user_msg_list)
-        with self.assert_database_query_count(9):
-            add_missing_messages(long_term_idle_user)
+        # Each batch of candidate messages is fetched, inserted, and
+        # recorded in last_active_message_id separately.
+        with self.assert_database_query_count(11):
+            messages_added = add_missing_messages(long_term_idle_user)
+        self.assertEqual(messages_added, num_new_messages)
         idle_user_msg_list = get_user_messages(long_term_idle_user)
         self.assert_length(idle_user_msg_list, idle_user_msg_count + num_new_messages)
         long_term_idle_user.refresh_from_db()
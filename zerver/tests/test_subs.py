@@ -5011,6 +5011,35 @@ class SubscriptionAPITest(ZulipTestCase):
             # Check non-new users are in peer_add event recipient list.
             self.assertIn(old_user, event_sent_to_ids)
 
+    def test_peer_add_events_merged_by_audience(self) -> None:
+        realm = get_realm("zulip")
+        iago = self.example_user("iago")
+        cordelia = self.example_user("cordelia")
+        polonius = self.example_user("polonius")
+        stream1 = self.make_stream("stream1")
+        stream2 = self.make_stream("stream2")
+        stream3 = self.make_stream("stream3")
+
+        # The guest only learns about subscribers to stream2.
+        self.subscribe(polonius, "stream2")
+
+        with self.capture_send_event_calls(expected_num_events=4) as events:
+            bulk_add_subscriptions(
+                realm, [stream1, stream2, stream3], [iago, cordelia], acting_user=None
+            )
+
+        peer_add_events = [event for event in events if event["event"].get("op") == "peer_add"]
+        self.assert_length(peer_add_events, 2)
+        stream1_event, stream2_event = sorted(
+            peer_add_events, key=lambda event: event["event"]["stream_ids"][0]
+        )
+        self.assertEqual(stream1_event["event"]["stream_ids"], [stream1.id, stream3.id])
+        self.assertEqual(stream1_event["event"]["user_ids"], sorted([iago.id, cordelia.id]))
+        self.assertNotIn(polonius.id, stream1_event["users"])
+        self.assertEqual(stream2_event["event"]["stream_ids"], [stream2.id])
+        self.assertEqual(stream2_event["event"]["user_ids"], sorted([iago.id, cordelia.id]))
+        self.assertIn(polonius.id, stream2_event["users"])
+
     def test_users_getting_remove_peer_event(self) -> None:
         """
         Check users getting add_peer_event is correct
@@ -5571,7 +5600,7 @@ class SubscriptionAPITest(ZulipTestCase):
         new_stream_announcements_stream = get_stream(self.streams[0], self.test_realm)
         self.test_realm.new_stream_announcements_stream_id = new_stream_announcements_stream.id
         self.test_realm.save()
-        with self.assert_database_query_count(48):
+        with self.assert_database_query_count(47):
             self.common_subscribe_to_streams(
                 self.test_user,
                 [new_streams[2]],
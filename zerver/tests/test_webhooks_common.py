@@ -5,9 +5,12 @@ from django.http import HttpRequest
 from django.http.response import HttpResponse
 from typing_extensions import override
 
+from zerver.actions.message_send import do_send_messages
 from zerver.actions.streams import do_rename_stream
 from zerver.decorator import webhook_view
 from zerver.lib.exceptions import InvalidJSONError, JsonableError
+from zerver.lib.request import RequestNotes
+from zerver.lib.response import json_success
 from zerver.lib.send_email import FromAddress
 from zerver.lib.test_classes import WebhookTestCase, ZulipTestCase
 from zerver.lib.test_helpers import HostRequestMock
@@ -16,6 +19,7 @@ from zerver.lib.webhooks.common import (
     INVALID_JSON_MESSAGE,
     MISSING_EVENT_HEADER_MESSAGE,
     MissingHTTPEventHeaderError,
+    check_send_webhook_message,
     get_fixture_http_headers,
     standardize_headers,
     validate_extract_webhook_http_header,
@@ -101,6 +105,61 @@ class WebhooksCommonTestCase(ZulipTestCase):
         self.assertEqual(msg.sender.id, self.notification_bot(webhook_bot_realm).id)
         self.assertEqual(msg.content, expected_msg.strip())
 
+    def test_webhook_messages_sent_together(self) -> None:
+        @webhook_view("ClientName")
+        def my_webhook(request: HttpRequest, user_profile: UserProfile) -> HttpResponse:
+            check_send_webhook_message(request, user_profile, "topic 1", "first", stream="Denmark")
+            check_send_webhook_message(request, user_profile, "topic 2", "second", stream="Denmark")
+            return json_success(request)
+
+        webhook_bot = get_user("webhook-bot@zulip.com", get_realm("zulip"))
+        request = HostRequestMock()
+        request.POST["api_key"] = get_api_key(webhook_bot)
+        request.host = "zulip.testserver"
+
+        with patch(
+            "zerver.lib.webhooks.common.do_send_messages", wraps=do_send_messages
+        ) as mock_send:
+            my_webhook(request)
+
+        mock_send.assert_called_once()
+        self.assert_length(mock_send.call_args.args[0], 2)
+        self.assertEqual(self.get_second_to_last_message().content, "first")
+        self.assertEqual(self.get_last_message().content, "second")
+        self.assertIsNone(RequestNotes.get_notes(request).webhook_messages)
+
+    def test_webhook_messages_send_failure_keeps_original_error(self) -> None:
+        @webhook_view("ClientName", notify_bot_owner_on_invalid_json=True)
+        def my_webhook(request: HttpRequest, user_profile: UserProfile) -> HttpResponse:
+            check_send_webhook_message(request, user_profile, "topic", "first", stream="Denmark")
+            raise InvalidJSONError("Malformed JSON")
+
+        webhook_bot_realm = get_realm("zulip")
+        webhook_bot = get_user("webhook-bot@zulip.com", webhook_bot_realm)
+        request = HostRequestMock()
+        request.POST["api_key"] = get_api_key(webhook_bot)
+        request.host = "zulip.testserver"
+
+        # Failing to send the messages generated before the error is
+        # logged, and the original error is still handled and raised.
+        with (
+            patch(
+                "zerver.lib.webhooks.common.do_send_messages",
+                side_effect=Exception("Database error"),
+            ),
+            self.assertLogs("zulip.zerver.webhooks", level="ERROR") as logs,
+            self.assertRaisesRegex(JsonableError, "Malformed JSON"),
+        ):
+            my_webhook(request)
+
+        self.assert_length(logs.output, 1)
+        self.assertIn("Database error", logs.output[0])
+        msg = self.get_last_message()
+        self.assertEqual(msg.sender.id, self.notification_bot(webhook_bot_realm).id)
+        self.assertEqual(
+            msg.content, INVALID_JSON_MESSAGE.format(webhook_name="ClientName").strip()
+        )
+
     @patch("zerver.lib.webhooks.common.importlib.import_module")
     def test_get_fixture_http_headers_for_success(self, import_module_mock: MagicMock) -> None:
         def fixture_to_headers(fixture_name: str) -> dict[str, str]:
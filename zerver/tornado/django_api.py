@@ -154,7 +154,9 @@ def send_notification_http(port: int, data: Mapping[str, Any]) -> None:
         # from creating import cycles.
         from zerver.tornado.event_queue import process_notification
 
-        process_notification(data)
+        # Batches from send_events are processed as their individual notices.
+        for notice in data.get("notices", [data]):
+            process_notification(notice)
     else:
         # This codepath is only used when running full-stack puppeteer
         # tests, which don't have RabbitMQ but do have a separate
@@ -181,16 +183,7 @@ def send_event(
 ) -> None:
     """`users` is a list of user IDs, or in some special cases like message
     send/update or embeds, dictionaries containing extra data."""
-    realm_ports = get_realm_tornado_ports(realm)
-    if len(realm_ports) == 1:
-        port_user_map = {realm_ports[0]: list(users)}
-    else:
-        port_user_map = defaultdict(list)
-        for user in users:
-            user_id = user if isinstance(user, int) else user["id"]
-            port_user_map[get_user_id_tornado_port(realm_ports, user_id)].append(user)
-
-    for port, port_users in port_user_map.items():
+    for port, port_users in get_port_user_map(realm, users).items():
         queue_json_publish(
             notify_tornado_queue_name(port),
             dict(event=event, users=port_users),
@@ -198,7 +191,51 @@ def send_event(
         )
 
 
+def send_events(
+    realm: Realm,
+    events: Sequence[tuple[Mapping[str, Any], Iterable[int] | Iterable[Mapping[str, Any]]]],
+) -> None:
+    """Sends several (event, users) pairs to Tornado, in order.
+
+    Rather than publishing each event separately, the events destined
+    for each Tornado shard are combined into a single notice, so code
+    paths which generate many events at once (e.g. sending a batch of
+    messages) pay the cost of publishing to RabbitMQ once per shard."""
+    port_notices: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    for event, users in events:
+        for port, port_users in get_port_user_map(realm, users).items():
+            port_notices[port].append(dict(event=event, users=port_users))
+
+    for port, notices in port_notices.items():
+        queue_json_publish(
+            notify_tornado_queue_name(port),
+            notices[0] if len(notices) == 1 else dict(notices=notices),
+            partial(send_notification_http, port),
+        )
+
+
+def get_port_user_map(
+    realm: Realm, users: Iterable[int] | Iterable[Mapping[str, Any]]
+) -> dict[int, list[Any]]:
+    realm_ports = get_realm_tornado_ports(realm)
+    if len(realm_ports) == 1:
+        return {realm_ports[0]: list(users)}
+
+    port_user_map: dict[int, list[Any]] = defaultdict(list)
+    for user in users:
+        user_id = user if isinstance(user, int) else user["id"]
+        port_user_map[get_user_id_tornado_port(realm_ports, user_id)].append(user)
+    return port_user_map
+
+
 def send_event_on_commit(
     realm: Realm, event: Mapping[str, Any], users: Iterable[int] | Iterable[Mapping[str, Any]]
 ) -> None:
     transaction.on_commit(lambda: send_event(realm, event, users))
+
+
+def send_events_on_commit(
+    realm: Realm,
+    events: Sequence[tuple[Mapping[str, Any], Iterable[int] | Iterable[Mapping[str, Any]]]],
+) -> None:
+    transaction.on_commit(lambda: send_events(realm, events))
@@ -1,6 +1,8 @@
 # See https://zulip.readthedocs.io/en/latest/subsystems/events-system.html for
 # high-level documentation on how this system works.
 import copy
+import io
+import itertools
 import logging
 import os
 import random
@@ -12,7 +14,7 @@ from collections.abc import Callable, Collection, Iterable, Mapping, MutableMapp
 from collections.abc import Set as AbstractSet
 from contextlib import suppress
 from functools import cache
-from typing import Any, Literal, TypedDict, cast
+from typing import Any, Literal, TypedDict, TypeVar, cast
 
 import orjson
 import tornado.ioloop
@@ -25,7 +27,7 @@ from version import API_FEATURE_LEVEL, ZULIP_MERGE_BASE, ZULIP_VERSION
 from zerver.lib.exceptions import JsonableError
 from zerver.lib.message_cache import MessageDict
 from zerver.lib.narrow_helpers import narrow_dataclasses_from_tuples
-from zerver.lib.narrow_predicate import build_narrow_predicate
+from zerver.lib.narrow_predicate import build_narrow_predicate, get_narrow_channel_name
 from zerver.lib.notification_data import UserMessageNotificationsData
 from zerver.lib.queue import queue_json_publish, retry_event
 from zerver.middleware import async_request_timer_restart
@@ -102,6 +104,7 @@ class ClientDescriptor:
         self._timeout_handle: Any = None  # TODO: should be return type of ioloop.call_later
         self.narrow = narrow
         self.narrow_predicate = build_narrow_predicate(modern_narrow)
+        self.narrow_channel_name = get_narrow_channel_name(modern_narrow)
         self.bulk_message_deletion = bulk_message_deletion
         self.stream_typing_notifications = stream_typing_notifications
         self.user_settings_object = user_settings_object
@@ -419,12 +422,17 @@ class EventQueue:
 def prune_internal_data(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Prunes the internal_data data structures, which are not intended to
     be exposed to API clients.
+
+    Each returned event is a new top-level dictionary, so changing it
+    does not change the event still held in the queue.  The nested
+    values are not copied; in particular, the message payloads, which
+    process_message_event shares between every client receiving the
+    same variant of a message, are not copied for each client, and
+    must be treated as read-only.
     """
-    events = copy.deepcopy(events)
-    for event in events:
-        if event["type"] == "message" and "internal_data" in event:
-            del event["internal_data"]
-    return events
+    return [
+        {key: value for key, value in event.items() if key != "internal_data"} for event in events
+    ]
 
 
 # Queue-ids which still need to be sent a web_reload_client event.
@@ -432,12 +440,21 @@ def prune_internal_data(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
 # loaded from disk.
 web_reload_clients: dict[str, Literal[True]] = {}
 
+ClientDictKeyT = TypeVar("ClientDictKeyT")
+
 # maps queue ids to client descriptors
 clients: dict[str, ClientDescriptor] = {}
 # maps user id to list of client descriptors
 user_clients: dict[int, list[ClientDescriptor]] = {}
-# maps realm id to list of client descriptors with all_public_streams=True
+# maps user id to list of client descriptors that accept message events;
+# this is the subset of user_clients that message fan-out needs to visit.
+user_message_clients: dict[int, list[ClientDescriptor]] = {}
+# maps realm id to list of client descriptors with all_public_streams=True,
+# or with a narrow that is not restricted to a single channel
 realm_clients_all_streams: dict[int, list[ClientDescriptor]] = {}
+# maps (realm id, lowercased channel name) to list of client descriptors
+# whose narrow restricts them to that channel
+realm_clients_by_narrow_channel: dict[tuple[int, str], list[ClientDescriptor]] = {}
 
 # list of registered gc hooks.
 # each one will be called with a user profile id, queue, and bool
@@ -452,7 +469,9 @@ def clear_client_event_queues_for_testing() -> None:
     clients.clear()
     web_reload_clients.clear()
     user_clients.clear()
+    user_message_clients.clear()
     realm_clients_all_streams.clear()
+    realm_clients_by_narrow_channel.clear()
     gc_hooks.clear()
 
 
@@ -479,13 +498,29 @@ def get_client_descriptors_for_user(user_profile_id: int) -> list[ClientDescript
     return user_clients.get(user_profile_id, [])
 
 
+def get_message_client_descriptors_for_user(user_profile_id: int) -> list[ClientDescriptor]:
+    return user_message_clients.get(user_profile_id, [])
+
+
 def get_client_descriptors_for_realm_all_streams(realm_id: int) -> list[ClientDescriptor]:
     return realm_clients_all_streams.get(realm_id, [])
 
 
+def get_client_descriptors_for_narrow_channel(
+    realm_id: int, channel_name: str
+) -> list[ClientDescriptor]:
+    return realm_clients_by_narrow_channel.get((realm_id, channel_name.lower()), [])
+
+
 def add_to_client_dicts(client: ClientDescriptor) -> None:
     user_clients.setdefault(client.user_profile_id, []).append(client)
-    if client.all_public_streams or client.narrow != []:
+    if client.accepts_messages():
+        user_message_clients.setdefault(client.user_profile_id, []).append(client)
+    if client.narrow_channel_name is not None:
+        realm_clients_by_narrow_channel.setdefault(
+            (client.realm_id, client.narrow_channel_name), []
+        ).append(client)
+    elif client.all_public_streams or client.narrow != []:
         realm_clients_all_streams.setdefault(client.realm_id, []).append(client)
 
 
@@ -502,7 +537,7 @@ def do_gc_event_queues(
     to_remove: AbstractSet[str], affected_users: AbstractSet[int], affected_realms: AbstractSet[int]
 ) -> None:
     def filter_client_dict(
-        client_dict: MutableMapping[int, list[ClientDescriptor]], key: int
+        client_dict: MutableMapping[ClientDictKeyT, list[ClientDescriptor]], key: ClientDictKeyT
     ) -> None:
         if key not in client_dict:
             return
@@ -515,10 +550,18 @@ def do_gc_event_queues(
 
     for user_id in affected_users:
         filter_client_dict(user_clients, user_id)
+        filter_client_dict(user_message_clients, user_id)
 
     for realm_id in affected_realms:
         filter_client_dict(realm_clients_all_streams, realm_id)
 
+    for id in to_remove:
+        narrow_channel_name = clients[id].narrow_channel_name
+        if narrow_channel_name is not None:
+            filter_client_dict(
+                realm_clients_by_narrow_channel, (clients[id].realm_id, narrow_channel_name)
+            )
+
     for id in to_remove:
         if id in web_reload_clients:
             del web_reload_clients[id]
@@ -575,39 +618,69 @@ def persistent_queue_filename(port: int, last: bool = False) -> str:
 
 def dump_event_queues(port: int) -> None:
     start = time.perf_counter()
+    bytes_written = 0
 
+    # We write one event queue per line, rather than a single JSON
+    # array, so that we never need to hold a serialized copy of every
+    # queue in memory at once, and so that a single queue which fails
+    # to deserialize doesn't prevent restoring all of the others.
     with open(persistent_queue_filename(port), "wb") as stored_queues:
-        stored_queues.write(
-            orjson.dumps([(qid, client.to_dict()) for (qid, client) in clients.items()])
-        )
+        for client in clients.values():
+            bytes_written += stored_queues.write(
+                orjson.dumps(client.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
+            )
 
     if len(clients) > 0 or settings.PRODUCTION:
         logging.info(
-            "Tornado %d dumped %d event queues in %.3fs",
+            "Tornado %d dumped %d event queues (%d bytes) in %.3fs",
             port,
             len(clients),
+            bytes_written,
             time.perf_counter() - start,
         )
 
 
+def read_stored_event_queues(
+    port: int, stored_queues: io.BufferedReader
+) -> dict[str, ClientDescriptor]:
+    if stored_queues.peek(1).startswith(b"["):
+        # TODO/compatibility: Servers before the switch to one queue
+        # per line dumped a single JSON array of (queue_id,
+        # client_dict) pairs.  Remove this when one can no longer
+        # directly upgrade from 9.x to main.
+        try:
+            data = orjson.loads(stored_queues.read())
+            return {qid: ClientDescriptor.from_dict(client) for (qid, client) in data}
+        except Exception:
+            logging.exception(
+                "Tornado %d could not deserialize event queues", port, stack_info=True
+            )
+            return {}
+
+    loaded_clients: dict[str, ClientDescriptor] = {}
+    for line in stored_queues:
+        try:
+            client = ClientDescriptor.from_dict(orjson.loads(line))
+        except Exception:
+            logging.exception(
+                "Tornado %d could not deserialize an event queue", port, stack_info=True
+            )
+            continue
+        loaded_clients[client.event_queue.id] = client
+    return loaded_clients
+
+
 def load_event_queues(port: int) -> None:
     global clients
     start = time.perf_counter()
+    bytes_read = 0
 
     try:
         with open(persistent_queue_filename(port), "rb") as stored_queues:
-            data = orjson.loads(stored_queues.read())
+            bytes_read = os.fstat(stored_queues.fileno()).st_size
+            clients = read_stored_event_queues(port, stored_queues)
     except FileNotFoundError:
         pass
-    except orjson.JSONDecodeError:
-        logging.exception("Tornado %d could not deserialize event queues", port, stack_info=True)
-    else:
-        try:
-            clients = {qid: ClientDescriptor.from_dict(client) for (qid, client) in data}
-        except Exception:
-            logging.exception(
-                "Tornado %d could not deserialize event queues", port, stack_info=True
-            )
 
     mark_clients_to_reload(clients.keys())
 
@@ -618,9 +691,10 @@ def load_event_queues(port: int) -> None:
 
     if len(clients) > 0 or settings.PRODUCTION:
         logging.info(
-            "Tornado %d loaded %d event queues in %.3fs",
+            "Tornado %d loaded %d event queues (%d bytes) in %.3fs",
             port,
             len(clients),
+            bytes_read,
             time.perf_counter() - start,
         )
 
@@ -908,12 +982,7 @@ def missedmessage_hook(
 def receiver_is_off_zulip(user_profile_id: int) -> bool:
     # If a user has no message-receiving event queues, they've got no open zulip
     # session so we notify them.
-    all_client_descriptors = get_client_descriptors_for_user(user_profile_id)
-    message_event_queues = [
-        client for client in all_client_descriptors if client.accepts_messages()
-    ]
-    off_zulip = len(message_event_queues) == 0
-    return off_zulip
+    return len(get_message_client_descriptors_for_user(user_profile_id)) == 0
 
 
 def maybe_enqueue_notifications(
@@ -995,7 +1064,15 @@ def get_client_info_for_message_event(
     # bots) that are registered to get events for ALL streams.
     if "stream_name" in event_template and not event_template.get("invite_only"):
         realm_id = event_template["realm_id"]
-        for client in get_client_descriptors_for_realm_all_streams(realm_id):
+        # Narrowed queues restricted to a single channel are indexed by
+        # that channel, so we only need to check the ones for this
+        # message's channel.
+        for client in itertools.chain(
+            get_client_descriptors_for_realm_all_streams(realm_id),
+            get_client_descriptors_for_narrow_channel(realm_id, event_template["stream_name"]),
+        ):
+            if not client.accepts_messages():
+                continue
             send_to_clients[client.event_queue.id] = dict(
                 client=client,
                 flags=[],
@@ -1006,7 +1083,7 @@ def get_client_info_for_message_event(
         user_profile_id: int = user_data["id"]
         flags: Collection[str] = user_data.get("flags", [])
 
-        for client in get_client_descriptors_for_user(user_profile_id):
+        for client in get_message_client_descriptors_for_user(user_profile_id):
             send_to_clients[client.event_queue.id] = dict(
                 client=client,
                 flags=flags,
@@ -1622,9 +1699,12 @@ def get_wrapped_process_notification(queue_name: str) -> Callable[[list[dict[str
 
     def wrapped_process_notification(notices: list[dict[str, Any]]) -> None:
         for notice in notices:
-            try:
-                process_notification(notice)
-            except Exception:
-                retry_event(queue_name, notice, failure_processor)
+            # Batches published by send_events are processed, and
+            # retried, as their individual notices.
+            for single_notice in notice.get("notices", [notice]):
+                try:
+                    process_notification(single_notice)
+                except Exception:
+                    retry_event(queue_name, single_notice, failure_processor)
 
     return wrapped_process_notification
@@ -43,7 +43,8 @@ def in_tornado_thread(f: Callable[P, T]) -> Callable[P, T]:
 def notify(request: HttpRequest, *, data: Json[dict[str, Any]]) -> HttpResponse:
     # Only the puppeteer full-stack tests use this endpoint; it
     # injects an event, as if read from RabbitMQ.
-    in_tornado_thread(process_notification)(data)
+    for notice in data.get("notices", [data]):
+        in_tornado_thread(process_notification)(notice)
     return json_success(request)
 
 
@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import CommandParser
+from django.utils.timezone import now as timezone_now
+from typing_extensions import override
+
+from zerver.lib.digest import bulk_get_digest_context, get_recent_topics
+from zerver.lib.management import ZulipBaseCommand
+from zerver.models import UserProfile
+
+
+class Command(ZulipBaseCommand):
+    help = """Times building digest email contexts for the users of a realm.
+
+This builds the contexts exactly as the digest_emails queue worker
+does, in batches of the same size, but doesn't send any email."""
+
+    @override
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days", help="How many days of traffic to include", default=7, type=int
+        )
+        parser.add_argument("--batch-size", help="Users per batch", default=30, type=int)
+        self.add_realm_args(parser, required=True)
+
+    @override
+    def handle(self, *args: Any, **options: Any) -> None:
+        realm = self.get_realm(options)
+        assert realm is not None
+        cutoff = (timezone_now() - timedelta(days=options["days"])).timestamp()
+        user_ids = list(
+            UserProfile.objects.filter(realm=realm, is_active=True, is_bot=False)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        batch_size = options["batch_size"]
+
+        get_recent_topics.cache_clear()
+        start = time.perf_counter()
+        for i in range(0, len(user_ids), batch_size):
+            users = UserProfile.objects.filter(id__in=user_ids[i : i + batch_size]).select_related(
+                "realm"
+            )
+            for _ in bulk_get_digest_context(users, cutoff):
+                pass
+        duration = time.perf_counter() - start
+
+        print(f"{len(user_ids)} users in {duration:.1f}s: {len(user_ids) / duration:.1f} users/s")
+        print(f"Recent topics cache: {get_recent_topics.cache_info()}")
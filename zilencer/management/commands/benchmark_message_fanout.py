@@ -0,0 +1,97 @@
+import time
+from typing import Any
+
+from django.core.management.base import CommandParser
+from typing_extensions import override
+
+from zerver.lib.management import ZulipBaseCommand
+from zerver.models import UserProfile
+from zerver.tornado.event_queue import allocate_client_descriptor, process_message_event
+
+
+class Command(ZulipBaseCommand):
+    help = """Times the in-process Tornado fan-out of a message event to many event queues.
+
+This does not touch the database or a running Tornado server; it
+allocates synthetic event queues in this process and measures
+process_message_event alone."""
+
+    @override
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--recipients",
+            help="Numbers of recipients to benchmark",
+            default=[1000, 10000, 50000],
+            nargs="+",
+            type=int,
+        )
+        parser.add_argument("--reps", help="Messages sent per recipient count", default=5, type=int)
+        parser.add_argument(
+            "--markdown-ratio",
+            help="Fraction of event queues registered with apply_markdown=True",
+            default=0.5,
+            type=float,
+        )
+
+    @override
+    def handle(self, *args: Any, **options: Any) -> None:
+        reps = options["reps"]
+        # Use user IDs that cannot collide with real users, so that the
+        # synthetic queues are never mixed with real ones.
+        next_user_id = -1
+
+        for count in options["recipients"]:
+            markdown_count = int(count * options["markdown_ratio"])
+            user_ids = []
+            for i in range(count):
+                user_ids.append(next_user_id)
+                allocate_client_descriptor(
+                    dict(
+                        user_profile_id=next_user_id,
+                        realm_id=0,
+                        event_types=None,
+                        client_type_name="website",
+                        apply_markdown=i < markdown_count,
+                        client_gravatar=True,
+                        all_public_streams=False,
+                        queue_timeout=0,
+                        last_connection_time=time.time(),
+                    )
+                )
+                next_user_id -= 1
+
+            users = [dict(id=user_id, flags=[]) for user_id in user_ids]
+            total_time = 0.0
+            for i in range(1, reps + 1):
+                event_template = dict(
+                    type="message",
+                    message_dict=dict(
+                        id=i,
+                        content="**hello**",
+                        rendered_content="<p><strong>hello</strong></p>",
+                        sender_id=user_ids[0],
+                        sender_email="sender@example.com",
+                        sender_delivery_email="sender@example.com",
+                        sender_full_name="Sender",
+                        sender_realm_id=0,
+                        sender_avatar_source=UserProfile.AVATAR_FROM_GRAVATAR,
+                        sender_avatar_version=1,
+                        sender_is_mirror_dummy=False,
+                        sender_email_address_visibility=UserProfile.EMAIL_ADDRESS_VISIBILITY_EVERYONE,
+                        type="stream",
+                        client="website",
+                        recipient_type=2,
+                        recipient_type_id=1,
+                    ),
+                    realm_id=0,
+                    stream_name="benchmark",
+                )
+                start = time.perf_counter()
+                process_message_event(event_template, users)
+                duration = time.perf_counter() - start
+                total_time += duration
+                print(f"  {count} recipients, {i}/{reps}: {duration:.3f}s")
+            print(
+                f"{count} recipients: {total_time / reps:.3f}s per message, "
+                f"{(count * reps) / total_time:.0f} deliveries/s"
+            )
@@ -0,0 +1,98 @@
+import statistics
+import time
+from typing import Any
+
+import orjson
+from django.core.management.base import CommandError, CommandParser
+from typing_extensions import override
+
+from zerver.lib.management import ZulipBaseCommand
+from zerver.lib.narrow import LARGER_THAN_MAX_MESSAGE_ID, NarrowParameter, fetch_messages
+from zerver.models import Recipient, UserMessage
+
+
+class Command(ZulipBaseCommand):
+    help = """Times fetching a page of messages for representative narrows, both
+at the newest messages and scrolled far back into history.
+
+Intended to be run against a large generated realm, e.g. one created
+with `./manage.py populate_db` with a large --extra-users and
+--max-topics, as one of its users."""
+
+    @override
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("email", metavar="<email>", help="email of the user to fetch as")
+        parser.add_argument(
+            "--narrow",
+            help="Narrow to benchmark, as JSON; may be repeated (default: a representative set)",
+            action="append",
+            default=[],
+        )
+        parser.add_argument(
+            "--depth",
+            help="How many of the user's messages back to place the deep history anchor",
+            default=100000,
+            type=int,
+        )
+        parser.add_argument("--num-before", default=100, type=int)
+        parser.add_argument("--reps", help="Fetches per narrow and anchor", default=20, type=int)
+        self.add_realm_args(parser)
+
+    @override
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["reps"] < 2:
+            raise CommandError("--reps must be at least 2, to compute percentiles.")
+        realm = self.get_realm(options)
+        user_profile = self.get_user(options["email"], realm)
+
+        if options["narrow"]:
+            narrows = [orjson.loads(narrow) for narrow in options["narrow"]]
+        else:
+            narrows = [[], [["is", "dm"]], [["is", "starred"]]]
+            latest_channel_message = (
+                UserMessage.objects.filter(
+                    user_profile=user_profile, message__recipient__type=Recipient.STREAM
+                )
+                .select_related("message__recipient")
+                .order_by("-message_id")
+                .first()
+            )
+            if latest_channel_message is not None:
+                message = latest_channel_message.message
+                channel = {"operator": "channel", "operand": message.recipient.type_id}
+                topic = {"operator": "topic", "operand": message.topic_name()}
+                narrows += [[channel], [channel, topic]]
+
+        deep_anchor = (
+            UserMessage.objects.filter(user_profile=user_profile)
+            .order_by("-message_id")
+            .values_list("message_id", flat=True)[options["depth"] : options["depth"] + 1]
+            .first()
+        )
+        anchors = [("newest", LARGER_THAN_MAX_MESSAGE_ID)]
+        if deep_anchor is not None:
+            anchors.append((f"{options['depth']} back", deep_anchor))
+
+        for narrow in narrows:
+            narrow_parameters = [NarrowParameter.model_validate(term) for term in narrow]
+            for anchor_name, anchor in anchors:
+                durations = []
+                for _ in range(options["reps"]):
+                    start = time.perf_counter()
+                    fetch_messages(
+                        narrow=narrow_parameters or None,
+                        user_profile=user_profile,
+                        realm=user_profile.realm,
+                        is_web_public_query=False,
+                        anchor=anchor,
+                        include_anchor=True,
+                        num_before=options["num_before"],
+                        num_after=0,
+                    )
+                    durations.append(time.perf_counter() - start)
+
+                quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+                print(
+                    f"{orjson.dumps(narrow).decode()}, {anchor_name}: "
+                    f"p50 {quantiles[49] * 1000:.1f}ms, p99 {quantiles[98] * 1000:.1f}ms"
+                )
@@ -0,0 +1,65 @@
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import CommandError, CommandParser
+from django.db import transaction
+from django.db.models import Max
+from typing_extensions import override
+
+from zerver.lib.management import ZulipBaseCommand
+from zerver.lib.user_message import UserMessageLite, bulk_insert_ums
+from zerver.models import Message, UserMessage
+
+
+class Command(ZulipBaseCommand):
+    help = """Compares INSERT and COPY for writing the UserMessage rows of one message.
+
+Each insert is done in a transaction which is rolled back, using
+synthetic user and message IDs; since the foreign key constraints are
+deferred until commit, this needs no setup and leaves no data behind."""
+
+    @override
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--recipients",
+            help="Numbers of recipients to benchmark",
+            default=[1000, 10000, 100000],
+            nargs="+",
+            type=int,
+        )
+        parser.add_argument(
+            "--reps", help="Messages sent per recipient count", default=20, type=int
+        )
+
+    @override
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["reps"] < 2:
+            raise CommandError("--reps must be at least 2, to compute percentiles.")
+        next_message_id = (Message.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+        flags = int(UserMessage.flags.mentioned)
+
+        for count in options["recipients"]:
+            for new_messages, method in [(False, "INSERT"), (True, "COPY")]:
+                durations = []
+                for _ in range(options["reps"]):
+                    ums = [
+                        UserMessageLite(
+                            user_profile_id=user_profile_id,
+                            message_id=next_message_id,
+                            flags=flags,
+                        )
+                        for user_profile_id in range(1, count + 1)
+                    ]
+                    next_message_id += 1
+                    with transaction.atomic(durable=True):
+                        start = time.perf_counter()
+                        bulk_insert_ums(ums, new_messages=new_messages)
+                        durations.append(time.perf_counter() - start)
+                        transaction.set_rollback(True)
+
+                quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+                print(
+                    f"{count} recipients, {method}: "
+                    f"p50 {quantiles[49] * 1000:.1f}ms, p99 {quantiles[98] * 1000:.1f}ms"
+                )
@@ -1,4 +1,5 @@
 import os
+import time
 from collections.abc import Iterator
 from typing import Any
 
@@ -43,7 +44,13 @@ class Command(ZulipBaseCommand):
             os.makedirs(dest_dir)
 
         with open(options["destination"], "wb") as result:
-            messages = Message.objects.filter(id__gt=latest - amount, id__lte=latest).order_by("id")
+            messages = (
+                Message.objects.filter(id__gt=latest - amount, id__lte=latest)
+                .select_related("sender", "realm")
+                .order_by("id")
+            )
+            count = 0
+            start = time.perf_counter()
             for message in queryset_iterator(messages):
                 content = message.content
                 # In order to ensure that the output of this tool is
@@ -67,3 +74,9 @@ class Command(ZulipBaseCommand):
                         option=orjson.OPT_APPEND_NEWLINE,
                     )
                 )
+                count += 1
+            duration = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Rendered {count} messages in {duration:.1f}s: {count / duration:.1f} messages/s"
+        )
@@ -194,6 +194,14 @@ KATEX_SERVER = get_config("application_server", "katex_server", True)
 KATEX_SERVER_PORT = get_config("application_server", "katex_server_port", "9700")
 MEMCACHED_LOCATION = "127.0.0.1:11211"
 MEMCACHED_USERNAME = None if get_secret("memcached_password") is None else "zulip@localhost"
+# Number of values from a few very hot memcached key families (see
+# zerver/lib/cache.py) to also cache in each process's memory, and
+# for how many seconds; 0 disables the in-process cache.  When it is
+# enabled, every request and queue event starts with one extra
+# memcached round trip, to check for invalidations; so it only helps
+# if requests typically read several of these keys.
+IN_PROCESS_CACHE_SIZE = 0
+IN_PROCESS_CACHE_TIMEOUT = 60
 RABBITMQ_HOST = "127.0.0.1"
 RABBITMQ_PORT = 5672
 RABBITMQ_VHOST = "/"